@@ -1,5 +1,6 @@
-import os
+from startup import startup_timer # Imported first so startup timing covers the other imports
 from flask import Flask, jsonify
+from werkzeug.exceptions import HTTPException
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS # Import CORS
 from dotenv import load_dotenv # Import load_dotenv
@@ -8,25 +9,74 @@ import logging # Import logging
 # Load environment variables from .env file for local development
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from config import Config # Import Config
+from structured_logging import log_pipeline
+
+# Configure logging: records are queued on the calling thread and written by a listener thread
+log_pipeline.configure(Config.LOG_LEVEL, Config.LOG_FORMAT, Config.LOG_SAMPLING, Config.LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
-from database import db, init_db
+from database import init_db, dispose_engines
 from auth import auth
 from routes import routes
-from config import Config # Import Config
+from jobs import jobs
+from tax_rules import registry as tax_rules_registry
+from tax_calculator import result_cache, warm_up
+from history_buffer import history_buffer
+from user_cache import user_cache
+from json_provider import init_json_provider
+from compression import init_compression
+from password_hashing import password_hasher
+from metrics import init_metrics
+from profiling import init_profiling
+startup_timer.mark("imports")
 
 app = Flask(__name__)
 
 # Load configuration from Config object
 app.config.from_object(Config)
 
+# Fast JSON serialization and response compression
+init_json_provider(app)
+init_compression(app)
+
 # Initialize JWT
 jwt = JWTManager(app)
 
-# Initialize SQLAlchemy DB
+# Request, SQL, cache and pool metrics on /metrics
+init_metrics(app, jwt)
+
+# Opt-in profiling of single requests (X-Profile header or PROFILE_EVERY_REQUEST)
+init_profiling(app)
+
+startup_timer.mark("app_setup")
+
+# Initialize SQLAlchemy DB (and check the schema if DB_CREATE_ON_STARTUP is set)
 init_db(app)
+startup_timer.mark("database")
+
+# Load tax rules and enable hot reload of the rules file
+tax_rules_registry.configure(app.config["TAX_RULES_PATH"], app.config["TAX_RULES_RELOAD_INTERVAL"])
+
+# Size the calculator result cache
+result_cache.configure(app.config["TAX_CACHE_MAX_ENTRIES"], app.config["TAX_CACHE_TTL"])
+
+# Size the cache of users resolved from JWT identities
+user_cache.configure(app.config["USER_CACHE_MAX_ENTRIES"], app.config["USER_CACHE_TTL"])
+
+# Bound the threads and queue used for password hashing
+password_hasher.configure(app.config["PASSWORD_HASH_METHOD"], app.config["PASSWORD_HASH_WORKERS"],
+                          app.config["PASSWORD_HASH_QUEUE"], app.config["PASSWORD_HASH_TIMEOUT"])
+
+# Buffer tax history inserts and write them in bulk, if enabled
+if app.config["HISTORY_WRITE_BEHIND"]:
+    history_buffer.start(app, app.config["HISTORY_FLUSH_SIZE"], app.config["HISTORY_FLUSH_INTERVAL"],
+                         app.config["HISTORY_MAX_PENDING"])
+startup_timer.mark("services")
+
+# Exercise the compiled tax tables so forked workers start warm
+warm_up()
+startup_timer.mark("warm_up")
 
 # Enable CORS for all routes (adjust origins as needed for production)
 CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
@@ -37,6 +87,18 @@ CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
 # Register blueprints
 app.register_blueprint(auth)
 app.register_blueprint(routes)
+app.register_blueprint(jobs)
+
+
+def after_fork():
+    """
+    Reset per-process state in a worker forked from a preloaded app.
+
+    Pooled database connections are dropped rather than shared with the master,
+    and the history flusher thread, which does not survive the fork, is restarted.
+    """
+    dispose_engines(app)
+    history_buffer.after_fork()
 
 # Health check endpoint
 @app.route("/health", methods=["GET"])
@@ -48,7 +110,11 @@ def health():
 @app.errorhandler(Exception)
 def handle_exception(e):
     """Handle unexpected errors."""
-    logger.error(f"Unhandled exception: {e}", exc_info=True)
+    # Let HTTP errors such as 400 for a malformed JSON body keep their status
+    if isinstance(e, HTTPException):
+        return jsonify({"message": e.description}), e.code
+
+    logger.error("Unhandled exception: %s", e, exc_info=True)
     
     # In development, provide detailed error information
     if app.config.get('DEBUG'):
@@ -86,6 +152,9 @@ def needs_fresh_token_response(callback):
     logger.warning("Fresh token required.")
     return jsonify({"message": "Fresh token required"}), 401
 
+startup_timer.mark("handlers")
+logger.info("Backend started in %.0f ms", startup_timer.report()["total"])
+
 
 if __name__ == "__main__":
     # In development, you can run with Flask's built-in server
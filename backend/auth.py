@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import User
 from database import db
+from password_hashing import password_hasher, HashingUnavailable
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,20 +26,22 @@ def signup() -> tuple:
         # Check if username already exists
         existing_user = User.query.filter_by(username=username).first()
         if existing_user:
-            logger.info(f"Signup attempt for existing username: {username}")
+            logger.info("Signup attempt for existing username: %s", username)
             return jsonify({"message": "Username already exists. Please choose a different one."}), 409 # Conflict
 
-        # Hash the password before storing it
-        # Use a stronger method if available, e.g., 'pbkdf2:sha256:260000' for more iterations
-        hashed_password = generate_password_hash(password, method="pbkdf2:sha256")
+        # Hash the password before storing it, with the method set by PASSWORD_HASH_METHOD
+        hashed_password = password_hasher.hash(password)
         user = User(username=username, password=hashed_password)
         db.session.add(user)
         db.session.commit()
-        logger.info(f"User '{username}' registered successfully.")
+        logger.info("User '%s' registered successfully.", username)
         return jsonify({"message": "User registered successfully!"}), 201 # Created
+    except HashingUnavailable as e:
+        logger.warning("Registration for '%s' rejected: %s", username, e)
+        return jsonify({"message": "Server is busy. Please try again shortly."}), 503, {"Retry-After": "1"}
     except Exception as e:
         db.session.rollback() # Rollback in case of error
-        logger.error(f"Error during user registration for '{username}': {e}", exc_info=True)
+        logger.error("Error during user registration for '%s': %s", username, e, exc_info=True)
         return jsonify({"message": "An error occurred during registration."}), 500
 
 @auth.route("/login", methods=["POST"])
@@ -59,16 +61,29 @@ def login() -> tuple:
     try:
         user = User.query.filter_by(username=username).first()
 
-        if user and check_password_hash(user.password, password):
+        if user and password_hasher.verify(user.password, password):
+            # Upgrade hashes created with older parameters while the password is at hand
+            if password_hasher.needs_rehash(user.password):
+                try:
+                    user.password = password_hasher.hash(password)
+                    db.session.commit()
+                    logger.info("Password hash of '%s' upgraded to %s.", username, password_hasher.method_id)
+                except HashingUnavailable:
+                    pass  # upgrade on a later login instead of delaying this one
+
             # Set expires_delta to a specific time, e.g., 30 minutes
             # from datetime import timedelta
             # access_token = create_access_token(identity=user.username, expires_delta=timedelta(minutes=30))
-            access_token = create_access_token(identity=user.username) # Using default expiration from config
-            logger.info(f"User '{username}' logged in successfully.")
+            # The user id claim lets protected routes skip the username lookup
+            access_token = create_access_token(identity=user.username, additional_claims={"uid": user.id}) # Using default expiration from config
+            logger.info("User '%s' logged in successfully.", username)
             return jsonify({"access_token": access_token}), 200
         else:
-            logger.info(f"Failed login attempt for username: {username}")
+            logger.info("Failed login attempt for username: %s", username)
             return jsonify({"message": "Invalid username or password"}), 401 # More specific error message
+    except HashingUnavailable as e:
+        logger.warning("Login for '%s' rejected: %s", username, e)
+        return jsonify({"message": "Server is busy. Please try again shortly."}), 503, {"Retry-After": "1"}
     except Exception as e:
-        logger.error(f"Error during login for '{username}': {e}", exc_info=True)
+        logger.error("Error during login for '%s': %s", username, e, exc_info=True)
         return jsonify({"message": "An error occurred during login."}), 500
\ No newline at end of file
@@ -0,0 +1,63 @@
+import gzip
+import logging
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html"
+}
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Compress a response body with 'gzip' or 'br'."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app: Flask) -> None:
+    """
+    Compress responses with the best encoding the client accepts.
+
+    Brotli is preferred when the brotli package is installed, otherwise gzip.
+    Only buffered responses of a compressible type and at least
+    COMPRESSION_MIN_SIZE bytes are compressed; streamed responses (e.g. the CSV
+    import) are left untouched. A compressed response's ETag is made weak,
+    because its bytes differ from the uncompressed representation.
+    """
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+
+    min_size = app.config.get("COMPRESSION_MIN_SIZE", 1024)
+    gzip_level = app.config.get("COMPRESSION_GZIP_LEVEL", 6)
+    brotli_quality = app.config.get("COMPRESSION_BROTLI_QUALITY", 4)
+    offered = (["br"] if brotli is not None else []) + ["gzip"]
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(offered)
+        if encoding is None or response.content_length is None or response.content_length < min_size:
+            return response
+
+        response.set_data(compress_body(response.get_data(), encoding, gzip_level, brotli_quality))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    logger.info("Response compression enabled: encodings=%s, min_size=%s", offered, min_size)
@@ -1,16 +1,85 @@
+from functools import wraps
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
 import logging
 
 logger = logging.getLogger(__name__)
-db = SQLAlchemy()
 
-def init_db(app):
-    """Initialize database and create tables."""
+# Bind key of the optional read replica (DATABASE_REPLICA_URL)
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the SELECTs of read-only routes to the read replica.
+
+    Inside a view decorated with @read_replica, plain SELECT statements use the
+    replica engine when one is configured. Writes, flushes and SELECT ... FOR
+    UPDATE always go to the primary, as does everything outside such views.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and REPLICA_BIND in self._db.engines
+                and isinstance(clause, Select) and clause._for_update_arg is None
+                and has_app_context() and g.get("use_read_replica")):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def read_replica(view):
+    """Route the SELECTs of a read-only view to the read replica, if one is configured."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_db(app, create_schema=None):
+    """
+    Initialize the database extension.
+
+    The schema check connects to the database and issues catalog queries, so it
+    only runs when DB_CREATE_ON_STARTUP is set (or create_schema is passed).
+    Otherwise no connection is made until the first request.
+    """
     db.init_app(app)
+    with app.app_context():
+        if REPLICA_BIND in db.engines:
+            logger.info("Read replica configured for read-only routes.")
+    if create_schema is None:
+        create_schema = app.config.get("DB_CREATE_ON_STARTUP", True)
+    if create_schema:
+        ensure_schema(app)
+
+
+def ensure_schema(app):
+    """Create missing tables and indexes."""
     with app.app_context():
         try:
             db.create_all()
+            # create_all() skips tables that already exist; add indexes introduced since
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(db.engine, checkfirst=True)
             logger.info("Database tables checked/created successfully.")
         except Exception as e:
-            logger.error(f"Error creating database tables: {e}")
-            logger.warning("Continuing with application startup despite database error.")
\ No newline at end of file
+            logger.error("Error creating database tables: %s", e)
+            logger.warning("Continuing with application startup despite database error.")
+
+
+def dispose_engines(app):
+    """
+    Drop pooled connections inherited from a parent process without closing them.
+
+    Call in a freshly forked worker so it opens its own connections instead of
+    sharing the parent's sockets.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
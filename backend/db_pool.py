@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waits for a connection.
+
+    The wait includes opening a new connection when the pool has room, so a
+    rising average points either at a saturated pool (raise DB_POOL_SIZE or
+    DB_MAX_OVERFLOW) or at a slow database connect. Checkouts that give up
+    after DB_POOL_TIMEOUT seconds are counted as timeouts.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """Checkout wait times in milliseconds, plus the current pool occupancy."""
+        with self._stats_lock:
+            checkouts, timeouts = self._checkouts, self._timeouts
+            wait_total, wait_max = self._wait_total, self._wait_max
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_total_ms": round(wait_total * 1000, 3),
+            "wait_avg_ms": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_max_ms": round(wait_max * 1000, 3)
+        }
+
+
+def engine_options(url: str, pool_size: int, max_overflow: int, pool_timeout: float,
+                   pool_recycle: int, pool_pre_ping: bool, statement_timeout_ms: int) -> Dict[str, Any]:
+    """
+    Build SQLAlchemy engine options for a database URL.
+
+    Args:
+        url: Database URL
+        pool_size: Connections kept open
+        max_overflow: Extra connections opened under load and closed when returned
+        pool_timeout: Seconds a checkout waits for a free connection
+        pool_recycle: Replace connections older than this many seconds (-1 never)
+        pool_pre_ping: Test connections on checkout so ones dropped by a database restart are replaced
+        statement_timeout_ms: PostgreSQL statement_timeout for every session (0 disables it)
+
+    Returns:
+        Keyword arguments for create_engine (SQLALCHEMY_ENGINE_OPTIONS)
+    """
+    # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite")):
+        return {}
+
+    options: Dict[str, Any] = {
+        "poolclass": TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping
+    }
+    if url.startswith("postgres") and statement_timeout_ms > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
+
+
+def pool_stats(engines: Dict[Optional[str], Engine]) -> Dict[str, Any]:
+    """Pool statistics of each engine, keyed 'primary' for the default bind and by bind key otherwise."""
+    stats = {}
+    for key, engine in engines.items():
+        pool = engine.pool
+        name = "primary" if key is None else key
+        if isinstance(pool, TimedQueuePool):
+            stats[name] = pool.stats()
+        else:
+            stats[name] = {"status": pool.status()}
+    return stats
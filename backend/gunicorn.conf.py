@@ -0,0 +1,67 @@
+"""
+Gunicorn settings for the backend, loaded automatically from the working directory.
+
+With preload_app the app is imported once in the master: the schema check
+(DB_CREATE_ON_STARTUP), rules compilation and warm-up happen there, and workers
+are forked with that state already in memory instead of each importing the app
+and querying the database catalog on start.
+"""
+import gc
+import glob
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Workers write their metrics here so /metrics can sum them. This file is read
+# before the app (and its Config) is imported, so the directory is set and
+# cleared of a previous run's stale snapshots before anything writes to it.
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "tax-backend-metrics"))
+
+
+def _remove_snapshots():
+    """
+    Delete the metrics snapshots (<pid>.json, retired.json and their .tmp files).
+
+    Only those files are removed, so METRICS_DIR may be a shared or pre-existing directory.
+    """
+    for pattern in ("[0-9]*.json", "[0-9]*.json.tmp", "retired.json", "retired.json.tmp"):
+        for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], pattern)):
+            name = os.path.basename(path).split(".", 1)[0]
+            if name.isdigit() or name == "retired":
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+os.makedirs(os.environ["METRICS_DIR"], exist_ok=True)
+_remove_snapshots()
+
+
+def on_exit(server):
+    _remove_snapshots()
+
+
+def child_exit(server, worker):
+    # Keep the worker's counters and histograms in the totals, drop its gauges,
+    # and free its pid for a later process
+    from metrics import retire_snapshot
+    retire_snapshot(os.environ["METRICS_DIR"], worker.pid)
+
+
+def when_ready(server):
+    # Move everything the preloaded app allocated out of the garbage collector's
+    # view, so collections in the workers do not touch (and copy) shared pages
+    if server.cfg.preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import after_fork
+        after_fork()
@@ -0,0 +1,193 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from models import TaxCalculation
+from database import db
+from history_rollup import apply_to_rollups
+
+logger = logging.getLogger(__name__)
+
+# Failures of the connection or database rather than of particular rows
+TRANSIENT_ERRORS = (OperationalError, PoolTimeoutError)
+
+HISTORY_FIELDS = [
+    "gross_income", "deductions", "taxable_income", "base_tax", "surcharge",
+    "health_education_cess", "total_tax", "effective_tax_rate",
+    "take_home_annual", "take_home_monthly"
+]
+
+
+def history_row(user_id: int, regime: str, tax_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the TaxCalculation column values for a calculate_tax result.
+
+    created_at is stamped here, so a buffered row keeps the time of the
+    calculation rather than the time it was flushed.
+    """
+    row = {field: tax_result[field] for field in HISTORY_FIELDS}
+    row.update(user_id=user_id, regime=regime, created_at=datetime.utcnow())
+    return row
+
+
+class HistoryBuffer:
+    """
+    Write-behind queue for tax history rows.
+
+    Rows are collected in memory and written by a background thread with one
+    multi-row INSERT whenever `flush_size` rows are pending or `flush_interval`
+    seconds have passed, and once more when the process exits. Until a flush,
+    rows are not visible to other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._rows: List[Dict[str, Any]] = []
+        self._app: Optional[Flask] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.flush_size = 500
+        self.flush_interval = 1.0
+        self.max_pending = 50000
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, app: Flask, flush_size: int, flush_interval: float, max_pending: int) -> None:
+        """Start the background flusher for an app; rows are written with its database."""
+        self._app = app
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-flusher", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+            logger.info("Tax history write-behind enabled: flush_size=%s, flush_interval=%ss", flush_size, flush_interval)
+
+    def after_fork(self) -> None:
+        """
+        Restart the flusher in a forked worker.
+
+        Only the forking thread survives a fork, so a buffer started in a
+        preloading master has no flusher in its workers. Locks are recreated in
+        case the flusher held one at the moment of the fork.
+        """
+        if self._thread is None:
+            return
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._rows = []
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="history-flusher", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, row: Dict[str, Any]) -> None:
+        """Queue a row built by history_row(); wakes the flusher once a full batch is pending."""
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) >= self.flush_size:
+                self._wakeup.notify()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self) -> int:
+        """
+        Write every pending row in one bulk insert.
+
+        Must be called inside an app context. If the insert fails because of
+        the rows, the batch is retried in halves until the failing rows are
+        isolated; those are dropped and logged, and the rest are committed.
+        If the database itself is unavailable, the rows are put back at the
+        front of the queue (up to `max_pending` rows) and retried on the next
+        flush.
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            written = 0
+            batches = deque([rows])
+            while batches:
+                batch = batches.popleft()
+                try:
+                    self._write(batch)
+                    written += len(batch)
+                except TRANSIENT_ERRORS as e:
+                    remaining = [row for pending in (batch, *batches) for row in pending]
+                    self._requeue(remaining)
+                    logger.error("Error flushing %s tax history rows: %s", len(remaining), e)
+                    break
+                except Exception as e:
+                    if len(batch) == 1:
+                        logger.error("Dropped tax history row of user %s that could not be written: %s",
+                                     batch[0].get("user_id"), e)
+                    else:
+                        middle = len(batch) // 2
+                        batches.extendleft((batch[middle:], batch[:middle]))
+            logger.debug("Flushed %s tax history rows", written)
+            return written
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows and update their rollups in one transaction, rolling back on failure."""
+        try:
+            db.session.execute(insert(TaxCalculation), rows)
+            apply_to_rollups(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        """Put unwritten rows back at the front of the queue, dropping the oldest beyond max_pending."""
+        with self._lock:
+            self._rows[:0] = rows
+            dropped = len(self._rows) - self.max_pending
+            if dropped > 0:
+                del self._rows[:dropped]
+                logger.error("Tax history buffer full, dropped %s oldest rows", dropped)
+
+    def stop(self) -> None:
+        """Stop the flusher and write whatever is still pending."""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._app is not None:
+            with self._app.app_context():
+                self.flush()
+                db.session.remove()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._stopping and len(self._rows) < self.flush_size:
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            with self._app.app_context():
+                try:
+                    self.flush()
+                finally:
+                    db.session.remove()
+
+
+history_buffer = HistoryBuffer()
@@ -0,0 +1,166 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import TaxCalculation, TaxHistoryRollup, HistoryVersion
+from database import db
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_SUMS = {
+    "total_gross_income": "gross_income",
+    "total_taxable_income": "taxable_income",
+    "total_tax": "total_tax",
+    "total_effective_tax_rate": "effective_tax_rate"
+}
+_UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+def financial_year_of(moment: datetime) -> str:
+    """Indian financial year (April to March) containing a date, e.g. '2024-25'."""
+    start = moment.year if moment.month >= 4 else moment.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def _rollup_deltas(rows: Iterable[Any], sign: int) -> Dict[Tuple[int, str, str], Dict[str, float]]:
+    """Aggregate history rows (dicts or TaxCalculation objects) into per-rollup increments."""
+    deltas = defaultdict(lambda: dict.fromkeys(["count", *ROLLUP_SUMS], 0))
+    for row in rows:
+        value = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+        delta = deltas[(value("user_id"), financial_year_of(value("created_at")), value("regime"))]
+        delta["count"] += sign
+        for column, field in ROLLUP_SUMS.items():
+            delta[column] += sign * (value(field) or 0)
+    return deltas
+
+
+def _increment(model, keys: Dict[str, Any], increments: Dict[str, float]) -> None:
+    """Add `increments` to the row of `model` identified by `keys`, creating it if missing."""
+    upsert_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if upsert_insert is not None:
+        stmt = upsert_insert(model).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: getattr(model, column) + stmt.excluded[column] for column in increments}
+        )
+        db.session.execute(stmt)
+        return
+
+    row = db.session.get(model, tuple(keys.values()), with_for_update=True)
+    if row is None:
+        db.session.add(model(**keys, **increments))
+    else:
+        for column, amount in increments.items():
+            setattr(row, column, getattr(row, column) + amount)
+
+
+def apply_to_rollups(rows: Iterable[Any], sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) history rows from their rollups.
+
+    Runs in the caller's session, so the rollups are committed together with the
+    inserted or deleted TaxCalculation rows. On PostgreSQL and SQLite each rollup
+    is one atomic INSERT ... ON CONFLICT DO UPDATE increment. The history version
+    of every affected user is bumped as well.
+    """
+    deltas = _rollup_deltas(rows, sign)
+    for (user_id, financial_year, regime), delta in deltas.items():
+        _increment(TaxHistoryRollup, {"user_id": user_id, "financial_year": financial_year, "regime": regime}, delta)
+    for user_id in {user_id for user_id, _, _ in deltas}:
+        _increment(HistoryVersion, {"user_id": user_id}, {"version": 1})
+
+
+def get_history_version(user_id: int) -> int:
+    """Counter that changes whenever the user's history changes (0 if it never has)."""
+    return db.session.scalar(select(HistoryVersion.version).where(HistoryVersion.user_id == user_id)) or 0
+
+
+def _summarize_group(rollups) -> Dict[str, Any]:
+    count = sum(rollup.count for rollup in rollups)
+    total_effective_tax_rate = sum(rollup.total_effective_tax_rate for rollup in rollups)
+    return {
+        "count": count,
+        "total_gross_income": round(sum(rollup.total_gross_income for rollup in rollups), 2),
+        "total_taxable_income": round(sum(rollup.total_taxable_income for rollup in rollups), 2),
+        "total_tax": round(sum(rollup.total_tax for rollup in rollups), 2),
+        "average_effective_tax_rate": round(total_effective_tax_rate / count, 2) if count else 0.0
+    }
+
+
+def summarize_history(user_id: int) -> Dict[str, Any]:
+    """
+    Summarize a user's tax history from the rollups alone.
+
+    Reads one row per financial year and regime the user has calculations in,
+    however long the history is.
+
+    Returns:
+        Overall totals, a per-regime split and per-financial-year totals (newest first)
+    """
+    rollups = [
+        rollup for rollup in TaxHistoryRollup.query.filter_by(user_id=user_id).all()
+        if rollup.count > 0
+    ]
+
+    by_regime = defaultdict(list)
+    by_year = defaultdict(list)
+    for rollup in rollups:
+        by_regime[rollup.regime].append(rollup)
+        by_year[rollup.financial_year].append(rollup)
+
+    summary = _summarize_group(rollups)
+    summary["regimes"] = {regime: _summarize_group(group) for regime, group in sorted(by_regime.items())}
+    summary["years"] = [
+        {
+            "financial_year": financial_year,
+            **_summarize_group(group),
+            "regimes": {rollup.regime: _summarize_group([rollup]) for rollup in group}
+        }
+        for financial_year, group in sorted(by_year.items(), reverse=True)
+    ]
+    return summary
+
+
+def rebuild_rollups(user_id: Optional[int] = None, batch_size: int = 10000) -> int:
+    """
+    Recompute rollups from scratch out of the TaxCalculation table.
+
+    History is scanned in id order, batch_size rows per query and per commit, so
+    memory use stays flat for any table size. Calculations saved or deleted while
+    the rebuild runs may be counted twice or missed; run it while history writes
+    are paused.
+
+    Args:
+        user_id: Only rebuild this user's rollups (every user if omitted)
+        batch_size: History rows read per batch
+
+    Returns:
+        Number of history rows rolled up
+    """
+    clear = delete(TaxHistoryRollup)
+    scan = select(TaxCalculation).order_by(TaxCalculation.id).limit(batch_size)
+    if user_id is not None:
+        clear = clear.where(TaxHistoryRollup.user_id == user_id)
+        scan = scan.where(TaxCalculation.user_id == user_id)
+
+    db.session.execute(clear)
+    last_id = db.session.scalar(select(func.max(TaxCalculation.id))) or 0
+    db.session.commit()
+
+    processed = 0
+    cursor = 0
+    while True:
+        rows = db.session.scalars(scan.where(TaxCalculation.id > cursor, TaxCalculation.id <= last_id)).all()
+        if not rows:
+            break
+        cursor = rows[-1].id
+        processed += len(rows)
+        apply_to_rollups(rows)
+        db.session.commit()
+        db.session.expunge_all()
+        logger.info("Rolled up %s history rows (up to id %s)", processed, cursor)
+    return processed
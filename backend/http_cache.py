@@ -0,0 +1,40 @@
+import hashlib
+from typing import Optional
+
+from flask import Response, current_app, request
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag value derived from everything a response depends on."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def calculator_cache_control() -> str:
+    """Cache-Control for responses that are pure functions of their inputs and the rules version."""
+    return f"private, max-age={current_app.config['HTTP_CACHE_MAX_AGE']}"
+
+
+# History can change at any time, so clients must revalidate before every reuse
+HISTORY_CACHE_CONTROL = "private, no-cache"
+
+
+def not_modified(etag: str, cache_control: str) -> Optional[Response]:
+    """
+    Return a 304 response if the request's If-None-Match already has this ETag.
+
+    Called before any work is done, so a revalidation costs neither a
+    calculation nor a history query.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def with_validators(response: Response, etag: str, cache_control: str) -> Response:
+    """Attach the ETag and Cache-Control headers to a full response."""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,290 @@
+import atexit
+import json
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from flask import Blueprint, Flask, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
+from models import TaxJob, TaxJobResult
+from database import db
+from tax_calculator import records_to_columns, calculate_tax_batch, batch_results_to_records
+from tax_rules import registry
+from routes import validate_batch_records
+from user_cache import get_current_user
+
+logger = logging.getLogger(__name__)
+jobs = Blueprint("jobs", __name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker(rules_path: str) -> None:
+    """Load the same rules file as the web worker in a freshly spawned pool process."""
+    registry.configure(rules_path, 0)
+
+
+def _pack_columns(records: List[Dict], default_year: Optional[str]) -> Tuple[np.ndarray, ...]:
+    """
+    Pack validated records into compact column arrays for a job.
+
+    The job keeps only these arrays, not the parsed request dicts, and hands
+    slices of them to the pool, so the input is held once and in far less memory.
+    """
+    incomes, regimes, deductions, rebates, years = records_to_columns(records, default_year)
+    return (
+        np.asarray(incomes, dtype=np.float64),
+        np.asarray(regimes, dtype=str),
+        np.asarray(deductions, dtype=np.float64),
+        rebates,
+        np.asarray(years, dtype=str)
+    )
+
+
+def _compute_shard(columns: Sequence[np.ndarray], rules_version: str) -> str:
+    """
+    Calculate one shard of a job and return its results as a JSON list; runs inside a pool process.
+
+    Pool processes outlive rules reloads in the web worker, so the shard carries
+    the version the job was started with and the rules file is reloaded here
+    when it differs from the one this process loaded.
+    """
+    if registry.rules.version != rules_version:
+        rules = registry.reload()
+        if rules.version != rules_version:
+            logger.warning("Job shard expected tax rules version %s, calculating with %s",
+                           rules_version, rules.version)
+    return json.dumps(batch_results_to_records(calculate_tax_batch(*columns)))
+
+
+def get_executor(workers: int, rules_path: str) -> ProcessPoolExecutor:
+    """
+    Return the process pool shared by every job of this web worker, creating it on first use.
+
+    The pool uses the spawn start method so workers never inherit the parent's
+    database connections or threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(rules_path,)
+            )
+            logger.info("Job process pool started with %s workers", workers)
+        return _executor
+
+
+@atexit.register
+def discard_executor() -> None:
+    """Stop the process pool, cancelling shards that have not started yet; the next job starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _update_job(job_id: str, **fields) -> None:
+    """Write job fields and bump updated_at, which doubles as the coordinator heartbeat."""
+    job = db.session.get(TaxJob, job_id)
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _run_job(app: Flask, job_id: str, columns: Tuple[np.ndarray, ...]) -> None:
+    """
+    Coordinate one job: shard the records over the process pool and store results as they complete.
+
+    Runs on a background thread of the web worker that accepted the job. At most
+    two shards per pool process are in flight, and each finished shard is
+    committed as a TaxJobResult together with the job's progress, so the
+    worker never holds more than a few shards of results.
+    """
+    with app.app_context():
+        pending = {}
+        try:
+            shard_size = app.config["JOB_SHARD_SIZE"]
+            workers = app.config["JOB_WORKERS"]
+            executor = get_executor(workers, app.config["TAX_RULES_PATH"])
+            total = len(columns[0])
+            rules_version = registry.rules.version
+            starts = iter(range(0, total, shard_size))
+            _update_job(job_id, status="running")
+
+            processed = 0
+            while True:
+                for start in starts:
+                    shard = [column[start:start + shard_size] for column in columns]
+                    pending[executor.submit(_compute_shard, shard, rules_version)] = start
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start = pending.pop(future)
+                    count = min(shard_size, total - start)
+                    db.session.add(TaxJobResult(job_id=job_id, start=start, count=count, result=future.result()))
+                    processed += count
+                    _update_job(job_id, processed_records=processed)
+
+            _update_job(job_id, status="completed", completed_at=datetime.utcnow())
+            logger.info("Tax job %s completed: records=%s", job_id, total)
+        except Exception as e:
+            db.session.rollback()
+            for future in pending:
+                future.cancel()
+            if isinstance(e, BrokenProcessPool):
+                discard_executor()
+            logger.error("Tax job %s failed: %s", job_id, e, exc_info=True)
+            TaxJobResult.query.filter_by(job_id=job_id).delete()
+            _update_job(job_id, status="failed", error=str(e), completed_at=datetime.utcnow())
+        finally:
+            db.session.remove()
+
+
+def _mark_if_stale(job: TaxJob) -> None:
+    """
+    Fail a job whose coordinator has stopped sending heartbeats.
+
+    A queued or running job is updated at least once per shard; if it has not
+    been touched for JOB_STALE_SECONDS the worker that owned it has died.
+    """
+    if job.status not in ("queued", "running"):
+        return
+    stale_after = timedelta(seconds=current_app.config["JOB_STALE_SECONDS"])
+    if datetime.utcnow() - job.updated_at > stale_after:
+        job.status = "failed"
+        job.error = "Job was interrupted before it completed."
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        logger.warning("Tax job %s marked failed after missing heartbeats", job.id)
+
+
+def _get_user_job(job_id: str) -> Optional[TaxJob]:
+    """Look up a job owned by the current user."""
+    user = get_current_user()
+    if not user:
+        return None
+    return TaxJob.query.filter_by(id=job_id, user_id=user.id).first()
+
+
+@jobs.route("/jobs", methods=["POST"])
+@jwt_required()
+def submit_job() -> tuple:
+    """Queue a large batch calculation and return its job id immediately."""
+    data = request.get_json()
+    if not data:
+        logger.warning("Job submission with no JSON data.")
+        return jsonify({"message": "No input data provided"}), 400
+
+    records = data.get("records")
+    default_year = data.get("financial_year")
+    if not isinstance(records, list) or not records:
+        logger.warning("Job submission without records.")
+        return jsonify({"message": "Records must be a non-empty list."}), 400
+
+    max_records = current_app.config.get("JOB_MAX_RECORDS", 1000000)
+    if len(records) > max_records:
+        logger.warning("Job of %s records exceeds limit of %s", len(records), max_records)
+        return jsonify({"message": f"A job may contain at most {max_records} records."}), 413
+
+    invalid = validate_batch_records(records, default_year)
+    if invalid:
+        index, error = invalid
+        logger.warning("Invalid job record %s: %s", index, error)
+        return jsonify({"message": f"Record {index}: {error}", "index": index}), 400
+
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    job = TaxJob(id=uuid.uuid4().hex, user_id=user.id, status="queued", total_records=len(records))
+    db.session.add(job)
+    db.session.commit()
+
+    thread = threading.Thread(
+        target=_run_job,
+        args=(current_app._get_current_object(), job.id, _pack_columns(records, default_year)),
+        name=f"tax-job-{job.id}",
+        daemon=True
+    )
+    thread.start()
+
+    logger.info("Tax job %s queued for user %s: records=%s", job.id, get_jwt_identity(), len(records))
+    return jsonify({"job_id": job.id, "status": job.status, "total_records": job.total_records}), 202
+
+
+@jobs.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def job_status(job_id: str) -> tuple:
+    """Return the status and progress of a job."""
+    job = _get_user_job(job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+
+    _mark_if_stale(job)
+    return jsonify(job.to_dict()), 200
+
+
+@jobs.route("/jobs/<job_id>/result", methods=["GET"])
+@jwt_required()
+def job_result(job_id: str):
+    """
+    Return the results of a completed job.
+
+    With `page`, returns the results of one shard (1-based, in input order);
+    otherwise streams all of them, one stored shard at a time.
+    """
+    job = _get_user_job(job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+
+    _mark_if_stale(job)
+    if job.status == "failed":
+        return jsonify({"message": "Job failed", "error": job.error}), 409
+    if job.status != "completed":
+        return jsonify({"message": "Job has not completed yet", "status": job.status,
+                        "processed_records": job.processed_records,
+                        "total_records": job.total_records}), 409
+
+    # Stored JSON is sent as-is instead of being decoded and re-encoded
+    chunks = TaxJobResult.query.filter_by(job_id=job.id).order_by(TaxJobResult.start)
+    prefix = f'{{"job_id": {json.dumps(job.id)}, "count": {job.total_records}'
+    page = request.args.get("page", type=int)
+    if page is not None:
+        page = max(page, 1)
+        pages = chunks.count()
+        chunk = chunks.offset(page - 1).first()
+        body = (f'{prefix}, "page": {page}, "pages": {pages}, "has_next": {json.dumps(page < pages)}, '
+                f'"results": {chunk.result if chunk else "[]"}}}')
+        return Response(body, status=200, mimetype="application/json")
+
+    starts = [chunk.start for chunk in chunks.with_entities(TaxJobResult.start)]
+    job_id = job.id
+
+    def generate():
+        yield f'{prefix}, "results": ['
+        separator = ""
+        for start in starts:
+            results = db.session.scalar(select(TaxJobResult.result).where(
+                TaxJobResult.job_id == job_id, TaxJobResult.start == start))[1:-1]
+            if results:
+                yield separator + results
+                separator = ", "
+        yield "]}"
+
+    return Response(stream_with_context(generate()), status=200, mimetype="application/json")
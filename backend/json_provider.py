@@ -0,0 +1,68 @@
+import logging
+from typing import Any
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib json module
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes with orjson when it is installed.
+
+    Output matches the default provider: keys are sorted when `sort_keys` is set,
+    dates go through Flask's default handler, and anything orjson cannot
+    serialize falls back to the stdlib. Pretty-printed (debug or non-compact)
+    responses always use the stdlib.
+    """
+
+    def __init__(self, app: Flask):
+        super().__init__(app)
+        self.options = 0
+        if orjson is not None:
+            self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _orjson_dumps(self, obj: Any) -> bytes:
+        options = self.options | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs.get("indent") is not None:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._orjson_dumps(obj).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Serialize straight to bytes, skipping the str round-trip of the default provider."""
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = self._orjson_dumps(obj) + b"\n"
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app: Flask) -> None:
+    """Install the JSON provider selected by JSON_PROVIDER ('auto', 'orjson' or 'stdlib')."""
+    choice = app.config.get("JSON_PROVIDER", "auto")
+    if choice == "stdlib":
+        return
+    if orjson is None:
+        if choice == "orjson":
+            logger.warning("JSON_PROVIDER=orjson but orjson is not installed; using the stdlib json module.")
+        return
+
+    sort_keys = app.json.sort_keys
+    app.json = FastJSONProvider(app)
+    app.json.sort_keys = sort_keys
+    logger.info("Using orjson for JSON responses.")
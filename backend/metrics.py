@@ -0,0 +1,432 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+from flask_jwt_extended import JWTManager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import db
+from db_pool import TimedQueuePool
+from tax_calculator import result_cache
+from user_cache import user_cache
+from structured_logging import log_pipeline
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Counters and histograms of exited workers, kept in the metrics directory
+RETIRED_SNAPSHOT = "retired.json"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Type and help text of every metric, in output order
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by endpoint, method and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by endpoint and method."),
+    "http_request_phase_seconds_total": (
+        "counter", "Request time by endpoint and phase: auth (until the JWT is verified), "
+                   "db (SQL statements) and handler (everything else)."),
+    "http_requests_in_flight": ("gauge", "HTTP requests being served."),
+    "db_queries_total": ("counter", "SQL statements by endpoint ('background' outside requests)."),
+    "db_query_seconds_total": ("counter", "Time spent in SQL statements by endpoint."),
+    "db_queries_per_request": ("histogram", "SQL statements per request by endpoint."),
+    "db_pool_size": ("gauge", "Connections kept open by the pool."),
+    "db_pool_checked_out": ("gauge", "Connections currently checked out of the pool."),
+    "db_pool_checkouts_total": ("counter", "Connection checkouts from the pool."),
+    "db_pool_checkout_timeouts_total": ("counter", "Checkouts that timed out waiting for a connection."),
+    "db_pool_checkout_wait_seconds_total": ("counter", "Time spent waiting for pool connections."),
+    "cache_entries": ("gauge", "Entries held by an in-process cache."),
+    "cache_hits_total": ("counter", "Cache lookups that found a live entry."),
+    "cache_misses_total": ("counter", "Cache lookups that found no live entry."),
+    "cache_evictions_total": ("counter", "Entries evicted to make room."),
+    "log_records_dropped_total": ("counter", "Log records dropped because the logging queue was full."),
+}
+
+
+def labels(**values: Any) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in values.items()))
+
+
+class MetricsRegistry:
+    """
+    Per-process metrics with optional aggregation across worker processes.
+
+    Each process keeps its counters, gauges and histograms in memory. With a
+    metrics directory set, every process also writes a snapshot to
+    `<directory>/<pid>.json` every `flush_interval` seconds, and render() merges
+    the snapshots of all processes: counters and histograms are summed over
+    every process that ever wrote one, gauges only over processes that are
+    still alive. When a worker exits, retire_snapshot() folds its counters and
+    histograms into `<directory>/retired.json` and removes its own snapshot,
+    so totals survive worker restarts without dead pids piling up.
+    """
+
+    def __init__(self):
+        self._reset()
+        self.directory = ""
+        self.flush_interval = 5.0
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # A forked worker starts from zero; the parent's values stay the parent's
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self.gauges: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self.histograms: Dict[Tuple[str, Labels], Dict[str, Any]] = {}
+        self._writer: Optional[threading.Thread] = None
+        # Tells this process's snapshot apart from that of an earlier process with the same pid
+        self._started = time.time()
+
+    def configure(self, directory: str, flush_interval: float) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def add_collector(self, collector: Callable[["MetricsRegistry"], None]) -> None:
+        """Register a function that sets gauges and counters from other components before each snapshot."""
+        self._collectors.append(collector)
+
+    def inc(self, name: str, label_set: Labels, value: float = 1.0) -> None:
+        with self._lock:
+            self.counters[(name, label_set)] += value
+
+    def set(self, name: str, label_set: Labels, value: float) -> None:
+        """Set a counter or gauge to an absolute value read from elsewhere."""
+        with self._lock:
+            target = self.gauges if METRICS[name][0] == "gauge" else self.counters
+            target[(name, label_set)] = value
+
+    def add_gauge(self, name: str, label_set: Labels, value: float) -> None:
+        with self._lock:
+            self.gauges[(name, label_set)] += value
+
+    def observe(self, name: str, label_set: Labels, value: float, buckets: Tuple[float, ...]) -> None:
+        with self._lock:
+            histogram = self.histograms.get((name, label_set))
+            if histogram is None:
+                histogram = self.histograms[(name, label_set)] = {
+                    "buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0
+                }
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.error("Metrics collector failed: %s", e)
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "started": self._started,
+                "counters": [[name, list(label_set), value] for (name, label_set), value in self.counters.items()],
+                "gauges": [[name, list(label_set), value] for (name, label_set), value in self.gauges.items()],
+                "histograms": [[name, list(label_set), dict(h, counts=list(h["counts"]))]
+                               for (name, label_set), h in self.histograms.items()],
+            }
+
+    def write(self) -> None:
+        """Write this process's snapshot to the metrics directory, atomically."""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        try:
+            with self._write_lock:
+                _write_json(path, self.snapshot())
+        except OSError as e:
+            logger.error("Could not write metrics snapshot %s: %s", path, e)
+
+    def ensure_writer(self) -> None:
+        """Start this process's snapshot writer; a no-op once running or without a metrics directory."""
+        if self.directory and self._writer is None:
+            with self._lock:
+                if self._writer is not None:
+                    return
+                self._writer = threading.Thread(target=self._run_writer, name="metrics-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.write)
+
+    def _run_writer(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.write()
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Snapshots of every process: read from the metrics directory, or just this process without one."""
+        if not self.directory:
+            return [self.snapshot()]
+        self.write()
+        # The retired snapshot is read first: a process it already includes is
+        # skipped even if its own snapshot has not been removed yet
+        retired = _read_json(os.path.join(self.directory, RETIRED_SNAPSHOT))
+        snapshots = [retired] if retired else []
+        included = {tuple(process) for process in retired["processes"]} if retired else set()
+        for path in glob.glob(os.path.join(self.directory, "[0-9]*.json")):
+            if not os.path.basename(path)[:-len(".json")].isdigit():
+                continue  # not a snapshot; the directory may be shared
+            snapshot = _read_json(path)
+            if snapshot and (snapshot["pid"], snapshot.get("started")) not in included:
+                snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        """All metrics, merged across processes, in the Prometheus text exposition format."""
+        counters, gauges, histograms = _merge(self.collect())
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (metric, label_set), h in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(h["buckets"], h["counts"]):
+                        lines.append(f"{name}_bucket{_format_labels(label_set + (('le', _format_value(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(label_set + (('le', '+Inf'),))} {h['count']}")
+                    lines.append(f"{name}_sum{_format_labels(label_set)} {_format_value(h['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(label_set)} {h['count']}")
+            else:
+                values = gauges if kind == "gauge" else counters
+                for (metric, label_set), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(label_set)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(snapshots: List[Dict[str, Any]]) -> Tuple[Dict, Dict, Dict]:
+    """Sum counters and histograms over snapshots, and gauges over those of live processes."""
+    counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+    gauges: Dict[Tuple[str, Labels], float] = defaultdict(float)
+    histograms: Dict[Tuple[str, Labels], Dict[str, Any]] = {}
+
+    for snapshot in snapshots:
+        for name, label_set, value in snapshot["counters"]:
+            counters[(name, tuple(map(tuple, label_set)))] += value
+        if snapshot["gauges"] and _alive(snapshot["pid"]):
+            for name, label_set, value in snapshot["gauges"]:
+                gauges[(name, tuple(map(tuple, label_set)))] += value
+        for name, label_set, h in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, label_set)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(h, counts=list(h["counts"]))
+            else:
+                merged["counts"] = [a + b for a, b in zip(merged["counts"], h["counts"])]
+                merged["sum"] += h["sum"]
+                merged["count"] += h["count"]
+    return counters, gauges, histograms
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # missing, or being replaced or removed right now
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def retire_snapshot(directory: str, pid: int) -> None:
+    """
+    Fold the counters and histograms of an exited process into the retired snapshot.
+
+    Called by the gunicorn master when a worker exits. The retired snapshot
+    lists the processes it includes, so readers never count one twice: it is
+    replaced first, then the process's own snapshot is removed. Its gauges are
+    dropped, and a later process reusing the pid starts from zero.
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    snapshot = _read_json(path)
+    if snapshot:
+        retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+        retired = _read_json(retired_path) or {"processes": [], "counters": [], "histograms": []}
+        counters, _, histograms = _merge([dict(retired, pid=0, gauges=[]), snapshot])
+        # Only processes whose own snapshot is still on disk need listing
+        processes = [
+            process for process in retired["processes"]
+            if (_read_json(os.path.join(directory, f"{process[0]}.json")) or {}).get("started") == process[1]
+        ]
+        processes.append([pid, snapshot.get("started")])
+        try:
+            _write_json(retired_path, {
+                "pid": 0,
+                "processes": processes,
+                "counters": [[name, list(label_set), value] for (name, label_set), value in counters.items()],
+                "gauges": [],
+                "histograms": [[name, list(label_set), h] for (name, label_set), h in histograms.items()],
+            })
+        except OSError as e:
+            logger.error("Could not write metrics snapshot %s: %s", retired_path, e)
+            return
+    for stale in (path, f"{path}.tmp"):
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_labels(label_set: Labels) -> str:
+    if not label_set:
+        return ""
+    escaped = (
+        key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in label_set
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+registry = MetricsRegistry()
+
+
+def _current_endpoint() -> str:
+    return (request.endpoint or "unmatched") if has_request_context() else "background"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_query_start
+    endpoint = _current_endpoint()
+    if has_request_context():
+        g.metrics_db_queries = g.get("metrics_db_queries", 0) + 1
+        g.metrics_db_seconds = g.get("metrics_db_seconds", 0.0) + elapsed
+    label_set = labels(endpoint=endpoint)
+    registry.inc("db_queries_total", label_set)
+    registry.inc("db_query_seconds_total", label_set, elapsed)
+
+
+def _collect_caches(metrics: MetricsRegistry) -> None:
+    for name, cache in (("tax_result", result_cache), ("user", user_cache)):
+        stats = cache.stats()
+        label_set = labels(cache=name)
+        metrics.set("cache_entries", label_set, stats["entries"])
+        metrics.set("cache_hits_total", label_set, stats["hits"])
+        metrics.set("cache_misses_total", label_set, stats["misses"])
+        metrics.set("cache_evictions_total", label_set, stats["evictions"])
+
+
+def _collect_logging(metrics: MetricsRegistry) -> None:
+    if log_pipeline.handler is not None:
+        metrics.set("log_records_dropped_total", (), log_pipeline.handler.dropped)
+
+
+def init_metrics(app: Flask, jwt: JWTManager) -> None:
+    """
+    Record request, SQL, cache and pool metrics and serve them on /metrics.
+
+    Every request is timed per endpoint and split into the time until its JWT was
+    verified, the time spent in SQL statements and the rest. Set METRICS_DIR
+    (gunicorn.conf.py does) so /metrics reports the totals of all workers rather
+    than of whichever worker answers the scrape.
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    registry.configure(app.config.get("METRICS_DIR", ""), app.config.get("METRICS_FLUSH_INTERVAL", 5.0))
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    registry.add_collector(_collect_caches)
+    registry.add_collector(_collect_logging)
+
+    def collect_pools(metrics: MetricsRegistry) -> None:
+        with app.app_context():
+            engines = dict(db.engines)
+        for key, engine in engines.items():
+            pool = engine.pool
+            if not isinstance(pool, TimedQueuePool):
+                continue
+            stats = pool.stats()
+            label_set = labels(bind="primary" if key is None else key)
+            metrics.set("db_pool_size", label_set, stats["size"])
+            metrics.set("db_pool_checked_out", label_set, stats["checked_out"])
+            metrics.set("db_pool_checkouts_total", label_set, stats["checkouts"])
+            metrics.set("db_pool_checkout_timeouts_total", label_set, stats["timeouts"])
+            metrics.set("db_pool_checkout_wait_seconds_total", label_set, stats["wait_total_ms"] / 1000)
+
+    registry.add_collector(collect_pools)
+
+    @jwt.token_verification_loader
+    def mark_token_verified(jwt_header, jwt_data):
+        g.metrics_auth_done = time.perf_counter()
+        return True
+
+    @app.before_request
+    def start_request_metrics():
+        registry.ensure_writer()
+        g.metrics_start = time.perf_counter()
+        registry.add_gauge("http_requests_in_flight", (), 1)
+
+    @app.after_request
+    def capture_status(response: Response) -> Response:
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        registry.add_gauge("http_requests_in_flight", (), -1)
+
+        endpoint = request.endpoint or "unmatched"
+        status = g.get("metrics_status", 500)
+        auth = g.get("metrics_auth_done", start) - start
+        db_seconds = g.get("metrics_db_seconds", 0.0)
+        route = labels(endpoint=endpoint, method=request.method)
+
+        registry.inc("http_requests_total", labels(endpoint=endpoint, method=request.method, status=status))
+        registry.observe("http_request_duration_seconds", route, elapsed, LATENCY_BUCKETS)
+        registry.observe("db_queries_per_request", labels(endpoint=endpoint),
+                         g.get("metrics_db_queries", 0), QUERY_COUNT_BUCKETS)
+        registry.inc("http_request_phase_seconds_total", labels(endpoint=endpoint, phase="auth"), auth)
+        registry.inc("http_request_phase_seconds_total", labels(endpoint=endpoint, phase="db"), db_seconds)
+        registry.inc("http_request_phase_seconds_total", labels(endpoint=endpoint, phase="handler"),
+                     max(elapsed - auth - db_seconds, 0.0))
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Prometheus metrics of every worker process."""
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    logger.info("Metrics enabled on /metrics (directory: %s)", registry.directory or "in-process only")
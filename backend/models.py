@@ -8,6 +8,9 @@ class User(db.Model):
     password = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     tax_calculations = db.relationship('TaxCalculation', backref='user', lazy=True, cascade='all, delete-orphan')
+    tax_jobs = db.relationship('TaxJob', backref='user', lazy=True, cascade='all, delete-orphan')
+    tax_rollups = db.relationship('TaxHistoryRollup', backref='user', lazy=True, cascade='all, delete-orphan')
+    history_version = db.relationship('HistoryVersion', backref='user', lazy=True, uselist=False, cascade='all, delete-orphan')
 
     def __repr__(self) -> str:
         """String representation of User object."""
@@ -16,6 +19,11 @@ class User(db.Model):
 
 class TaxCalculation(db.Model):
     """Model to store user's tax calculation history."""
+    __table_args__ = (
+        # Serves the per-user, newest-first history listing and its keyset cursor
+        db.Index('ix_tax_calculation_user_created', 'user_id', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     gross_income = db.Column(db.Float, nullable=False)
@@ -51,4 +59,73 @@ class TaxCalculation(db.Model):
             'take_home_annual': self.take_home_annual,
             'take_home_monthly': self.take_home_monthly,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class TaxHistoryRollup(db.Model):
+    """Running totals of a user's tax history per financial year and regime."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    financial_year = db.Column(db.String(7), primary_key=True)  # e.g. '2024-25', from the calculation date
+    regime = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_gross_income = db.Column(db.Float, nullable=False, default=0)
+    total_taxable_income = db.Column(db.Float, nullable=False, default=0)
+    total_tax = db.Column(db.Float, nullable=False, default=0)
+    total_effective_tax_rate = db.Column(db.Float, nullable=False, default=0)  # sum, for the average
+
+    def __repr__(self) -> str:
+        """String representation of TaxHistoryRollup object."""
+        return f'<TaxHistoryRollup user_id={self.user_id} {self.financial_year}/{self.regime} count={self.count}>'
+
+
+class HistoryVersion(db.Model):
+    """Per-user counter bumped on every history insert or delete, used for history ETags."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """String representation of HistoryVersion object."""
+        return f'<HistoryVersion user_id={self.user_id} version={self.version}>'
+
+
+class TaxJob(db.Model):
+    """Model to track background batch calculation jobs and store their results."""
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed' or 'failed'
+    total_records = db.Column(db.Integer, nullable=False)
+    processed_records = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    result_chunks = db.relationship('TaxJobResult', backref='job', lazy=True, cascade='all, delete-orphan')
+
+    def __repr__(self) -> str:
+        """String representation of TaxJob object."""
+        return f'<TaxJob {self.id} status={self.status}>'
+
+    def to_dict(self) -> dict:
+        """Convert job status (without results) to dictionary for JSON serialization."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total_records': self.total_records,
+            'processed_records': self.processed_records,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class TaxJobResult(db.Model):
+    """Results of one shard of a job, stored as it completes."""
+    job_id = db.Column(db.String(32), db.ForeignKey('tax_job.id'), primary_key=True)
+    start = db.Column(db.Integer, primary_key=True)  # index of the shard's first record
+    count = db.Column(db.Integer, nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON list of the shard's per-record results
+
+    def __repr__(self) -> str:
+        """String representation of TaxJobResult object."""
+        return f'<TaxJobResult {self.job_id} start={self.start} count={self.count}>'
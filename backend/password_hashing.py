@@ -0,0 +1,113 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, Tuple, TypeVar
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def normalize_method(method: str) -> str:
+    """
+    Expand a werkzeug hashing method to the full parameters it writes into hashes.
+
+    e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:<default iterations>', 'scrypt' -> 'scrypt:32768:8:1'
+    """
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    raise ValueError(f"Unsupported password hashing method: {method}")
+
+
+def _scheme_and_cost(method_id: str) -> Tuple[str, int]:
+    """
+    Split normalized method parameters into the scheme and a comparable cost.
+
+    e.g. 'pbkdf2:sha256:1000000' -> ('pbkdf2:sha256', 1000000), 'scrypt:32768:8:1' -> ('scrypt', 32768 * 8 * 1)
+    """
+    name, *args = method_id.split(":")
+    if name == "pbkdf2":
+        return f"pbkdf2:{args[0]}", int(args[1])
+    n, r, p = map(int, args)
+    return name, n * r * p
+
+
+class HashingUnavailable(Exception):
+    """Raised when the hashing pool is saturated or a hash does not finish in time."""
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small, bounded thread pool.
+
+    At most `workers` hashes run at once (hashlib releases the GIL while it
+    hashes, so request threads keep serving calculations meanwhile) and at most
+    `max_queue` more may wait. Anything beyond that is rejected immediately with
+    HashingUnavailable instead of piling up behind a burst of logins.
+    """
+
+    def __init__(self, method: str = "pbkdf2:sha256", workers: int = 2, max_queue: int = 8,
+                 timeout: float = 10):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(method, workers, max_queue, timeout)
+
+    def configure(self, method: str, workers: int, max_queue: int, timeout: float) -> None:
+        """Set the hashing method (werkzeug format, e.g. 'pbkdf2:sha256') and pool limits."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self.method = method
+            # Parameters as written into stored hashes, e.g. 'pbkdf2:sha256:1000000'
+            self.method_id = normalize_method(method)
+            self._scheme, self._cost = _scheme_and_cost(self.method_id)
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(workers + max_queue)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    def _run(self, func: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Password hashing pool saturated, rejecting request.")
+            raise HashingUnavailable("Too many concurrent password operations.")
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingUnavailable("Password hashing timed out.") from None
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash: str, password: str) -> bool:
+        """Check a password against a stored hash, whatever method it was created with."""
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """
+        True if a stored hash should be replaced with one of the configured method.
+
+        That is the case when it uses another scheme or a lower cost; hashes with a
+        higher cost than configured are kept, so lowering the setting never weakens them.
+        """
+        try:
+            scheme, cost = _scheme_and_cost(normalize_method(stored_hash.split("$", 1)[0]))
+        except ValueError:
+            return True
+        return scheme != self._scheme or cost < self._cost
+
+
+password_hasher = PasswordHasher()
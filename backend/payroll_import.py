@@ -0,0 +1,147 @@
+import codecs
+import csv
+import io
+import json
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tax_calculator import calculate_tax_records
+
+RESULT_FIELDS = [
+    "gross_income", "deductions", "taxable_income", "base_tax", "surcharge",
+    "health_education_cess", "total_tax", "effective_tax_rate", "tax_per_month",
+    "take_home_annual", "take_home_monthly"
+]
+CSV_FIELDS = ["row", "regime"] + RESULT_FIELDS + ["error"]
+
+
+def _parse_number(value: Optional[str], default: Optional[float] = None) -> Optional[float]:
+    """Parse a CSV cell as a finite number; blank cells give `default`, bad ones None."""
+    if value is None or not value.strip():
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _parse_row(row: Dict[str, str], validate: Callable[..., Optional[str]]) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Turn one CSV row into a calculation record.
+
+    Returns:
+        (record, None) for a valid row, or (None, error message) for an invalid one
+    """
+    regime = (row.get("regime") or "").strip()
+    financial_year = (row.get("financial_year") or "").strip() or None
+    income = _parse_number(row.get("income"))
+    error = validate(income, regime, financial_year)
+    if error:
+        return None, error
+
+    deductions = _parse_number(row.get("deductions"), 0)
+    if deductions is None:
+        return None, "Deductions must be a valid number."
+
+    rebates = {}
+    for column, value in row.items():
+        if column and column.startswith("rebate") and value and value.strip():
+            amount = _parse_number(value)
+            if amount is None or amount < 0:
+                return None, f"Rebate '{column}' must be a valid non-negative number."
+            rebates[column] = amount
+
+    return {
+        "income": income,
+        "regime": regime,
+        "deductions": deductions,
+        "rebates": rebates,
+        "financial_year": financial_year
+    }, None
+
+
+def decode_lines(stream: Any) -> Iterator[str]:
+    """
+    Decode a binary stream into text lines for the CSV reader, dropping a UTF-8 BOM.
+
+    Only `readline` is used, so this works on any WSGI input (gunicorn's request
+    body is not a full io object, so io.TextIOWrapper cannot wrap it) as well as
+    on uploaded files. Line endings are kept for the csv module.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    for line in iter(stream.readline, b""):
+        yield decoder.decode(line)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _compute_chunk(chunk: List[Tuple[int, Optional[Dict], Optional[str]]], default_year: str) -> List[Dict]:
+    """Calculate the valid records of a chunk in one batch and merge back the invalid rows."""
+    records = [record for _, record, _ in chunk if record]
+    results = iter(calculate_tax_records(records, default_year) if records else [])
+
+    output = []
+    for row_number, record, error in chunk:
+        if record:
+            output.append({"row": row_number, "regime": record["regime"], **next(results)})
+        else:
+            output.append({"row": row_number, "error": error})
+    return output
+
+
+def _format_csv(rows: List[Dict], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _format_ndjson(rows: List[Dict]) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def stream_payroll_results(lines: Iterable[str], validate: Callable[..., Optional[str]], default_year: str,
+                           chunk_size: int = 5000, output_format: str = "csv") -> Iterator[str]:
+    """
+    Calculate tax for a payroll CSV and yield the results chunk by chunk.
+
+    Rows are read lazily and calculated `chunk_size` at a time through the batch
+    engine, so memory use does not grow with the size of the file. Invalid rows
+    are reported inline with an error instead of aborting the file.
+
+    Args:
+        lines: Text lines of a CSV with income and regime columns, and optional
+            deductions, financial_year and rebate* columns
+        validate: Validator called with (income, regime, financial_year) that
+            returns an error message or None
+        default_year: Financial year used for rows without one
+        chunk_size: Number of rows calculated per batch
+        output_format: 'csv' or 'ndjson'
+
+    Yields:
+        Formatted output, one chunk at a time
+    """
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "income" not in reader.fieldnames or "regime" not in reader.fieldnames:
+        error = {"row": 0, "error": "CSV must have a header with income and regime columns."}
+        yield _format_csv([error], header=True) if output_format == "csv" else _format_ndjson([error])
+        return
+
+    chunk = []
+    first = True
+    # Row numbers count data rows from 1, matching the line after the header
+    for row_number, row in enumerate(reader, start=1):
+        record, error = _parse_row(row, validate)
+        chunk.append((row_number, record, error))
+        if len(chunk) >= chunk_size:
+            rows = _compute_chunk(chunk, default_year)
+            yield _format_csv(rows, header=first) if output_format == "csv" else _format_ndjson(rows)
+            chunk, first = [], False
+
+    if chunk or first:
+        rows = _compute_chunk(chunk, default_year)
+        yield _format_csv(rows, header=first) if output_format == "csv" else _format_ndjson(rows)
@@ -0,0 +1,203 @@
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Kept identical to StackSampler in frontend/profiling.py: the backend and frontend are
+# separate Docker build contexts and images, so neither can import the other.
+class StackSampler:
+    """
+    Sampling profiler for one thread.
+
+    A background thread reads the target thread's current Python stack every
+    `interval` seconds and counts identical stacks. Functions are identified by
+    name, file and first line, so samples anywhere in a function add up.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class QueryRecord(NamedTuple):
+    statement: str
+    duration_ms: float
+    callsite: str
+
+
+def _callsite() -> str:
+    """Innermost frame in the backend's own code that led to the current statement."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(BACKEND_DIR) and filename != __file__:
+            return f"{os.path.basename(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+# Its id and sampler setup mirror RequestProfile in frontend/profiling.py.
+class RequestProfile:
+    """Samples and SQL statements captured for one profiled request."""
+
+    def __init__(self, interval: float):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.started = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.queries: List[QueryRecord] = []
+        self.sampler.start()
+
+
+def n_plus_one_report(queries: List[QueryRecord], threshold: int) -> List[Dict]:
+    """
+    Group statements by their SQL text, most executed first.
+
+    Statements are parameterized, so a query run once per row of an earlier
+    result shows up as one statement executed many times from the same call
+    site; groups run at least `threshold` times are flagged as likely N+1.
+    """
+    groups: Dict[str, Dict] = {}
+    for query in queries:
+        group = groups.setdefault(query.statement, {
+            "statement": query.statement, "count": 0, "total_ms": 0.0, "callsites": Counter()
+        })
+        group["count"] += 1
+        group["total_ms"] += query.duration_ms
+        group["callsites"][query.callsite] += 1
+    report = sorted(groups.values(), key=lambda group: (-group["count"], -group["total_ms"]))
+    for group in report:
+        group["suspect"] = group["count"] >= threshold
+    return report
+
+
+def write_profile(directory: str, profile: RequestProfile, stacks: Counter, summary: str,
+                  threshold: int) -> None:
+    """Write <id>.collapsed (flamegraph.pl / speedscope input) and <id>.sql.txt."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{profile.id}.collapsed"), "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    report = n_plus_one_report(profile.queries, threshold)
+    total_ms = sum(query.duration_ms for query in profile.queries)
+    with open(os.path.join(directory, f"{profile.id}.sql.txt"), "w") as f:
+        f.write(f"{summary}\n")
+        f.write(f"{len(profile.queries)} statements, {len(report)} distinct, {total_ms:.2f} ms in SQL\n")
+        suspects = [group for group in report if group["suspect"]]
+        f.write(f"Likely N+1 (run {threshold}+ times): {len(suspects)}\n")
+        for group in report:
+            marker = "N+1? " if group["suspect"] else ""
+            f.write(f"\n{marker}{group['count']}x, {group['total_ms']:.2f} ms total\n")
+            for callsite, count in group["callsites"].most_common():
+                f.write(f"  from {callsite} ({count}x)\n")
+            f.write(f"  {' '.join(group['statement'].split())}\n")
+        f.write("\nIn order:\n")
+        for query in profile.queries:
+            f.write(f"  {query.duration_ms:8.2f} ms  {query.callsite}  {' '.join(query.statement.split())[:200]}\n")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get("profile") is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_profile_start", None)
+    if start is not None and has_request_context():
+        profile = g.get("profile")
+        if profile is not None:
+            profile.queries.append(QueryRecord(statement, (time.perf_counter() - start) * 1000, _callsite()))
+
+
+def init_profiling(app: Flask) -> None:
+    """
+    Profile individual requests on demand.
+
+    A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>`, or every
+    request when PROFILE_EVERY_REQUEST is set. Its stack is sampled every
+    PROFILE_INTERVAL_MS and every SQL statement is recorded with its timing and
+    call site; the results are written to PROFILE_DIR and the response carries
+    the file prefix in `X-Profile-Id`. With neither setting, no hooks are
+    installed at all.
+    """
+    token = app.config.get("PROFILE_TOKEN", "")
+    every_request = app.config.get("PROFILE_EVERY_REQUEST", False)
+    if not token and not every_request:
+        return
+
+    directory = app.config.get("PROFILE_DIR")
+    interval = app.config.get("PROFILE_INTERVAL_MS", 1.0) / 1000
+    threshold = app.config.get("PROFILE_N_PLUS_ONE_THRESHOLD", 3)
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_profile():
+        header = request.headers.get("X-Profile")
+        if every_request or (header and token and hmac.compare_digest(header.encode(), token.encode())):
+            g.profile = RequestProfile(interval)
+
+    @app.after_request
+    def finish_profile(response: Response) -> Response:
+        profile: Optional[RequestProfile] = g.pop("profile", None)
+        if profile is None:
+            return response
+        stacks = profile.sampler.stop()
+        elapsed_ms = (time.perf_counter() - profile.started) * 1000
+        summary = (f"{request.method} {request.full_path.rstrip('?')} -> {response.status_code} "
+                   f"({request.endpoint}) in {elapsed_ms:.2f} ms")
+        try:
+            write_profile(directory, profile, stacks, summary, threshold)
+        except OSError as e:
+            logger.error("Could not write profile %s: %s", profile.id, e)
+            return response
+        response.headers["X-Profile-Id"] = profile.id
+        logger.info("Profiled %s: %s SQL statements, written to %s.*",
+                    summary, len(profile.queries), os.path.join(directory, profile.id))
+        return response
+
+    @app.teardown_request
+    def discard_profile(error=None):
+        # A request that failed before after_request still has its sampler running
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.sampler.stop()
+
+    logger.warning("Request profiling enabled (%s), writing to %s",
+                   "every request" if every_request else "X-Profile header", directory)
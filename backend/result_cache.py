@@ -0,0 +1,123 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    The cache holds at most `max_entries` results; the least recently used entry is
+    evicted when it is full and entries older than `ttl` seconds are treated as
+    misses. Hit, miss, eviction and expiration counters can be read with stats().
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 300):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def configure(self, max_entries: int, ttl: float) -> None:
+        """Resize the cache and change the entry lifetime (max_entries=0 disables it)."""
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self._evict_overflow()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (True, value) for a live entry, or (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if the cache is full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._evict_overflow()
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry if it is cached."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def memoize(self, key: Callable[..., Tuple], copy: Callable[[Any], Any] = lambda value: value) -> Callable:
+        """
+        Decorator caching a function's results under key(*args, **kwargs).
+
+        Args:
+            key: Builds the normalized cache key from the call arguments
+            copy: Applied to every returned value so callers never share a cached object
+
+        Returns:
+            Decorator; the undecorated function stays available as `.uncached`
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                try:
+                    cache_key = (func.__name__,) + key(*args, **kwargs)
+                    hash(cache_key)
+                except TypeError:
+                    # Unhashable or unsortable input: compute without caching
+                    return func(*args, **kwargs)
+
+                found, value = self.get(cache_key)
+                if not found:
+                    value = func(*args, **kwargs)
+                    self.put(cache_key, value)
+                return copy(value)
+
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -1,13 +1,90 @@
-from flask import Blueprint, request, jsonify
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+import numpy as np
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User, TaxCalculation
-from database import db
-from tax_calculator import calculate_tax, compare_tax_regimes, calculate_tax_slabs_breakdown
+from sqlalchemy import and_, or_
+from models import TaxCalculation
+from database import db, read_replica
+from db_pool import pool_stats
+from tax_calculator import (
+    calculate_tax, compare_tax_regimes, calculate_tax_slabs_breakdown, calculate_tax_full,
+    calculate_tax_records, result_cache, solve_regime_breakeven,
+    calculate_tax_curve
+)
+from tax_rules import registry
+from payroll_import import decode_lines, stream_payroll_results
+from history_buffer import history_buffer, history_row
+from user_cache import get_current_user
+from history_rollup import apply_to_rollups, summarize_history, get_history_version
+from http_cache import make_etag, not_modified, with_validators, calculator_cache_control, HISTORY_CACHE_CONTROL
 import logging
 
 logger = logging.getLogger(__name__)
 routes = Blueprint("routes", __name__)
 
+
+def validate_financial_year(financial_year) -> Optional[str]:
+    """Return the validation error for an optional financial year, or None if it is valid."""
+    if financial_year is not None and (not isinstance(financial_year, str) or financial_year not in registry.rules.years):
+        return "Unknown financial year."
+    return None
+
+
+def validate_rebates(rebates) -> Optional[str]:
+    """Return the validation error for an optional rebates object, or None if it is valid."""
+    if rebates is None:
+        return None
+    if not isinstance(rebates, dict) or not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0 for v in rebates.values()):
+        return "Rebates must be an object of non-negative numbers."
+    return None
+
+
+def validate_tax_input(income, regime, financial_year=None, rebates=None) -> Optional[str]:
+    """Return the validation error for an income/regime/financial year/rebates, or None if they are valid."""
+    if income is None or not isinstance(income, (int, float)):
+        return "Income must be a valid number."
+    if income < 0:
+        return "Income cannot be negative."
+    if not isinstance(regime, str) or regime not in ["old", "new"]:
+        return "Tax regime must be 'old' or 'new'."
+    return validate_rebates(rebates) or validate_financial_year(financial_year)
+
+
+def validate_batch_records(records: list, default_year=None) -> Optional[Tuple[int, str]]:
+    """Return (index, error) for the first invalid record of a batch, or None if all are valid."""
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            return index, "Each record must be an object."
+        error = validate_tax_input(record.get("income"), record.get("regime"),
+                                   record.get("financial_year", default_year))
+        if error:
+            return index, error
+        deductions = record.get("deductions", 0)
+        if not isinstance(deductions, (int, float)):
+            return index, "Deductions must be a valid number."
+        error = validate_rebates(record.get("rebates") or None)
+        if error:
+            return index, error
+    return None
+
+
+def save_to_history(regime: str, tax_result: dict) -> None:
+    """Save a calculate_tax result to the current user's history (buffered if write-behind is on)."""
+    user = get_current_user()
+    if not user:
+        return
+    row = history_row(user.id, regime, tax_result)
+    if history_buffer.running:
+        history_buffer.enqueue(row)
+    else:
+        db.session.add(TaxCalculation(**row))
+        apply_to_rollups([row])
+        db.session.commit()
+
+
 @routes.route("/calculate-tax", methods=["POST"])
 @jwt_required()
 def tax() -> tuple:
@@ -21,166 +98,493 @@ def tax() -> tuple:
     regime = data.get("regime")
     deductions = data.get("deductions", 0)
     rebates = data.get("rebates", {})
+    financial_year = data.get("financial_year")
     save_history = data.get("save_history", True)
 
     # Input validation
-    if income is None or not isinstance(income, (int, float)):
-        logger.warning(f"Invalid income type received: {type(income)}")
-        return jsonify({"message": "Income must be a valid number."}), 400
-    if income < 0:
-        logger.warning(f"Negative income received: {income}")
-        return jsonify({"message": "Income cannot be negative."}), 400
-
-    if not isinstance(regime, str) or regime not in ["old", "new"]:
-        logger.warning(f"Invalid tax regime received: {regime}")
-        return jsonify({"message": "Tax regime must be 'old' or 'new'."}), 400
+    error = validate_tax_input(income, regime, financial_year, rebates)
+    if error:
+        logger.warning("Invalid tax input received: income=%r, regime=%r, financial_year=%r, rebates=%r", income, regime, financial_year, rebates)
+        return jsonify({"message": error}), 400
 
     try:
-        tax_result = calculate_tax(income, regime, deductions, rebates)
+        tax_result = calculate_tax(income, regime, deductions, rebates, financial_year)
         
         # Save to history if requested
         if save_history:
-            current_user_identity = get_jwt_identity()
-            user = User.query.filter_by(username=current_user_identity).first()
-            if user:
-                calculation = TaxCalculation(
-                    user_id=user.id,
-                    gross_income=tax_result['gross_income'],
-                    deductions=tax_result['deductions'],
-                    taxable_income=tax_result['taxable_income'],
-                    base_tax=tax_result['base_tax'],
-                    surcharge=tax_result['surcharge'],
-                    health_education_cess=tax_result['health_education_cess'],
-                    total_tax=tax_result['total_tax'],
-                    effective_tax_rate=tax_result['effective_tax_rate'],
-                    regime=regime,
-                    take_home_annual=tax_result['take_home_annual'],
-                    take_home_monthly=tax_result['take_home_monthly']
-                )
-                db.session.add(calculation)
-                db.session.commit()
-        
-        logger.info(f"Tax calculated for user {get_jwt_identity()}: income={income}, regime={regime}, tax={tax_result['total_tax']}")
+            save_to_history(regime, tax_result)
+
+        logger.info("Tax calculated for user %s: income=%s, regime=%s, tax=%s", get_jwt_identity(), income, regime, tax_result['total_tax'])
         return jsonify(tax_result), 200
     except Exception as e:
-        logger.error(f"Error during tax calculation for user {get_jwt_identity()}: {e}")
+        logger.error("Error during tax calculation for user %s: %s", get_jwt_identity(), e)
         return jsonify({"message": "An error occurred during tax calculation."}), 500
 
 
-@routes.route("/compare-regimes", methods=["POST"])
+@routes.route("/calculate-tax/full", methods=["POST"])
 @jwt_required()
-def compare_regimes() -> tuple:
-    """Compare tax liability between old and new regimes."""
+def tax_full() -> tuple:
+    """Calculate tax, its slab breakdown and the regime comparison in one request."""
     data = request.get_json()
     if not data:
-        logger.warning("Regime comparison attempt with no JSON data.")
+        logger.warning("Full tax calculation attempt with no JSON data.")
         return jsonify({"message": "No input data provided"}), 400
 
     income = data.get("income")
+    regime = data.get("regime")
     deductions = data.get("deductions", 0)
+    rebates = data.get("rebates", {})
+    financial_year = data.get("financial_year")
+    save_history = data.get("save_history", True)
+
+    error = validate_tax_input(income, regime, financial_year, rebates)
+    if error:
+        logger.warning("Invalid tax input received: income=%r, regime=%r, financial_year=%r, rebates=%r", income, regime, financial_year, rebates)
+        return jsonify({"message": error}), 400
+
+    try:
+        result = calculate_tax_full(income, regime, deductions, rebates, financial_year)
+        if save_history:
+            save_to_history(regime, result["calculation"])
+
+        logger.info("Full tax calculation for user %s: income=%s, regime=%s, tax=%s", get_jwt_identity(), income, regime, result['calculation']['total_tax'])
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error("Error during full tax calculation for user %s: %s", get_jwt_identity(), e)
+        return jsonify({"message": "An error occurred during tax calculation."}), 500
+
+
+@routes.route("/calculate-tax/batch", methods=["POST"])
+@jwt_required()
+def tax_batch() -> tuple:
+    """Calculate tax for many income records in a single request."""
+    data = request.get_json()
+    if not data:
+        logger.warning("Batch tax calculation attempt with no JSON data.")
+        return jsonify({"message": "No input data provided"}), 400
+
+    records = data.get("records")
+    default_year = data.get("financial_year")
+    if not isinstance(records, list) or not records:
+        logger.warning("Batch tax calculation attempt without records.")
+        return jsonify({"message": "Records must be a non-empty list."}), 400
+
+    max_records = current_app.config.get("BATCH_MAX_RECORDS", 10000)
+    if len(records) > max_records:
+        logger.warning("Batch of %s records exceeds limit of %s", len(records), max_records)
+        return jsonify({"message": f"A batch may contain at most {max_records} records."}), 413
+
+    invalid = validate_batch_records(records, default_year)
+    if invalid:
+        index, error = invalid
+        logger.warning("Invalid batch record %s: %s", index, error)
+        return jsonify({"message": f"Record {index}: {error}", "index": index}), 400
+
+    try:
+        results = calculate_tax_records(records, default_year)
+    except Exception as e:
+        logger.error("Error during batch tax calculation for user %s: %s", get_jwt_identity(), e)
+        return jsonify({"message": "An error occurred during batch tax calculation."}), 500
+
+    logger.info("Batch tax calculated for user %s: records=%s", get_jwt_identity(), len(records))
+    return jsonify({"count": len(records), "results": results}), 200
+
+
+@routes.route("/calculate-tax/csv", methods=["POST"])
+@jwt_required()
+def tax_csv() -> tuple:
+    """Calculate tax for an uploaded payroll CSV, streaming results back as they are computed."""
+    output_format = request.args.get("format")
+    if output_format is None:
+        output_format = "ndjson" if "application/x-ndjson" in request.headers.get("Accept", "") else "csv"
+    if output_format not in ["csv", "ndjson"]:
+        logger.warning("Invalid output format for CSV import: %s", output_format)
+        return jsonify({"message": "Format must be 'csv' or 'ndjson'."}), 400
+
+    # Accept either a multipart upload (field "file") or a raw text/csv body
+    upload = request.files.get("file")
+    lines = decode_lines(upload.stream if upload else request.stream)
+
+    logger.info("Payroll CSV import started for user %s: format=%s", get_jwt_identity(), output_format)
+    results = stream_payroll_results(
+        lines,
+        validate_tax_input,
+        registry.rules.default_year,
+        chunk_size=current_app.config.get("CSV_CHUNK_SIZE", 5000),
+        output_format=output_format
+    )
+    mimetype = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(results), mimetype=mimetype), 200
+
+
+@routes.route("/compare-regimes", methods=["GET", "POST"])
+@jwt_required()
+def compare_regimes() -> tuple:
+    """
+    Compare tax liability between old and new regimes.
+
+    GET takes the inputs as query parameters and returns a cacheable response
+    with an ETag; POST takes a JSON body.
+    """
+    if request.method == "GET":
+        income = request.args.get("income", type=float)
+        deductions = request.args.get("deductions", 0, type=float)
+        financial_year = request.args.get("financial_year")
+    else:
+        data = request.get_json()
+        if not data:
+            logger.warning("Regime comparison attempt with no JSON data.")
+            return jsonify({"message": "No input data provided"}), 400
+
+        income = data.get("income")
+        deductions = data.get("deductions", 0)
+        financial_year = data.get("financial_year")
 
     if income is None or not isinstance(income, (int, float)) or income < 0:
-        logger.warning(f"Invalid income for comparison: {income}")
+        logger.warning("Invalid income for comparison: %s", income)
         return jsonify({"message": "Income must be a valid non-negative number."}), 400
+    if validate_financial_year(financial_year):
+        logger.warning("Invalid financial year for comparison: %s", financial_year)
+        return jsonify({"message": "Unknown financial year."}), 400
+
+    if request.method == "GET":
+        rules = registry.rules
+        etag = make_etag("compare-regimes", income, deductions, financial_year or rules.default_year, rules.version)
+        cached = not_modified(etag, calculator_cache_control())
+        if cached:
+            return cached
 
     try:
-        comparison = compare_tax_regimes(income, deductions)
-        logger.info(f"Tax regimes compared for user {get_jwt_identity()}: income={income}")
+        comparison = compare_tax_regimes(income, deductions, financial_year)
+        logger.info("Tax regimes compared for user %s: income=%s", get_jwt_identity(), income)
+        if request.method == "GET":
+            return with_validators(jsonify(comparison), etag, calculator_cache_control()), 200
         return jsonify(comparison), 200
     except Exception as e:
-        logger.error(f"Error during regime comparison: {e}")
+        logger.error("Error during regime comparison: %s", e)
         return jsonify({"message": "An error occurred during comparison."}), 500
 
 
+@routes.route("/regime-breakeven", methods=["POST"])
+@jwt_required()
+def regime_breakeven() -> tuple:
+    """Solve the breakeven deduction and the income ranges where each regime wins."""
+    data = request.get_json()
+    if not data:
+        logger.warning("Regime breakeven attempt with no JSON data.")
+        return jsonify({"message": "No input data provided"}), 400
+
+    income = data.get("income")
+    deductions = data.get("deductions", 0)
+    financial_year = data.get("financial_year")
+
+    if income is None or not isinstance(income, (int, float)) or income < 0:
+        logger.warning("Invalid income for breakeven: %s", income)
+        return jsonify({"message": "Income must be a valid non-negative number."}), 400
+    if not isinstance(deductions, (int, float)) or deductions < 0:
+        logger.warning("Invalid deductions for breakeven: %s", deductions)
+        return jsonify({"message": "Deductions must be a valid non-negative number."}), 400
+    if validate_financial_year(financial_year):
+        logger.warning("Invalid financial year for breakeven: %s", financial_year)
+        return jsonify({"message": "Unknown financial year."}), 400
+
+    try:
+        solution = solve_regime_breakeven(income, deductions, financial_year)
+        logger.info("Regime breakeven solved for user %s: income=%s, deductions=%s", get_jwt_identity(), income, deductions)
+        return jsonify(solution), 200
+    except Exception as e:
+        logger.error("Error solving regime breakeven: %s", e)
+        return jsonify({"message": "An error occurred while solving the regime breakeven."}), 500
+
+
 @routes.route("/tax-slabs/<regime>", methods=["GET"])
 @jwt_required()
 def get_tax_slabs(regime: str) -> tuple:
     """Get detailed tax slab breakdown."""
     income = request.args.get("income", type=float)
+    financial_year = request.args.get("financial_year")
     
     if income is None or income < 0:
-        logger.warning(f"Invalid income for slab breakdown: {income}")
+        logger.warning("Invalid income for slab breakdown: %s", income)
         return jsonify({"message": "Income must be a valid non-negative number."}), 400
     
     if regime not in ["old", "new"]:
-        logger.warning(f"Invalid tax regime: {regime}")
+        logger.warning("Invalid tax regime: %s", regime)
         return jsonify({"message": "Tax regime must be 'old' or 'new'."}), 400
 
+    if validate_financial_year(financial_year):
+        logger.warning("Invalid financial year for slab breakdown: %s", financial_year)
+        return jsonify({"message": "Unknown financial year."}), 400
+
+    rules = registry.rules
+    etag = make_etag("tax-slabs", regime, income, financial_year or rules.default_year, rules.version)
+    cached = not_modified(etag, calculator_cache_control())
+    if cached:
+        return cached
+
     try:
-        breakdown = calculate_tax_slabs_breakdown(income, regime)
-        logger.info(f"Tax slab breakdown generated for user {get_jwt_identity()}: income={income}, regime={regime}")
-        return jsonify({"regime": regime, "income": income, "slabs": breakdown}), 200
+        breakdown = calculate_tax_slabs_breakdown(income, regime, financial_year)
+        logger.info("Tax slab breakdown generated for user %s: income=%s, regime=%s", get_jwt_identity(), income, regime)
+        response = jsonify({"regime": regime, "income": income, "slabs": breakdown})
+        return with_validators(response, etag, calculator_cache_control()), 200
     except Exception as e:
-        logger.error(f"Error generating slab breakdown: {e}")
+        logger.error("Error generating slab breakdown: %s", e)
         return jsonify({"message": "An error occurred while generating slab breakdown."}), 500
 
 
+@routes.route("/tax-curve", methods=["GET"])
+@jwt_required()
+def tax_curve() -> tuple:
+    """Tax, take-home and effective rate across an income range, for charting."""
+    income_from = request.args.get("income_from", 0, type=float)
+    income_to = request.args.get("income_to", type=float)
+    step = request.args.get("step", type=float)
+    points = request.args.get("points", 100, type=int)
+    regime = request.args.get("regime", "both")
+    deductions = request.args.get("deductions", 0, type=float)
+    financial_year = request.args.get("financial_year")
+    downsample = request.args.get("downsample", "true").lower() != "false"
+    max_points = current_app.config.get("CURVE_MAX_POINTS", 10000)
+
+    if income_to is None or income_from < 0 or income_to <= income_from:
+        logger.warning("Invalid income range for tax curve: %s - %s", income_from, income_to)
+        return jsonify({"message": "Provide income_to greater than a non-negative income_from."}), 400
+    if regime not in ["old", "new", "both"]:
+        logger.warning("Invalid tax regime for tax curve: %s", regime)
+        return jsonify({"message": "Tax regime must be 'old', 'new' or 'both'."}), 400
+    if deductions < 0:
+        logger.warning("Invalid deductions for tax curve: %s", deductions)
+        return jsonify({"message": "Deductions must be a valid non-negative number."}), 400
+    if validate_financial_year(financial_year):
+        logger.warning("Invalid financial year for tax curve: %s", financial_year)
+        return jsonify({"message": "Unknown financial year."}), 400
+
+    if step is not None:
+        if step <= 0 or (income_to - income_from) / step + 1 > max_points:
+            logger.warning("Invalid step for tax curve: %s", step)
+            return jsonify({"message": f"Step must be positive and yield at most {max_points} points."}), 400
+        incomes = np.arange(income_from, income_to, step)
+        incomes = np.append(incomes, income_to)
+    else:
+        if not 2 <= points <= max_points:
+            logger.warning("Invalid point count for tax curve: %s", points)
+            return jsonify({"message": f"Points must be between 2 and {max_points}."}), 400
+        incomes = np.linspace(income_from, income_to, points)
+
+    try:
+        regimes = ["old", "new"] if regime == "both" else [regime]
+        curves = calculate_tax_curve(incomes, regimes, deductions, financial_year, downsample)
+        logger.info("Tax curve generated for user %s: %s-%s, points=%s", get_jwt_identity(), income_from, income_to, len(incomes))
+        return jsonify({
+            "income_from": income_from,
+            "income_to": income_to,
+            "deductions": deductions,
+            "downsampled": downsample,
+            "curves": curves
+        }), 200
+    except Exception as e:
+        logger.error("Error generating tax curve: %s", e)
+        return jsonify({"message": "An error occurred while generating the tax curve."}), 500
+
+
+@routes.route("/tax-rules", methods=["GET"])
+@jwt_required()
+def tax_rules() -> tuple:
+    """List the financial years and regimes the calculator has rules for."""
+    rules = registry.rules
+    return jsonify({
+        "version": rules.version,
+        "default_year": rules.default_year,
+        "financial_years": {year: sorted(regimes) for year, regimes in rules.years.items()}
+    }), 200
+
+
+@routes.route("/cache-stats", methods=["GET"])
+@jwt_required()
+def cache_stats() -> tuple:
+    """Report hit, miss and eviction counters of the calculator result cache."""
+    return jsonify(result_cache.stats()), 200
+
+
+@routes.route("/db-stats", methods=["GET"])
+@jwt_required()
+def db_stats() -> tuple:
+    """Report connection pool occupancy and checkout wait times of the primary and replica engines."""
+    return jsonify(pool_stats(db.engines)), 200
+
+
+def encode_history_cursor(calculation: TaxCalculation) -> str:
+    """Opaque cursor pointing at a calculation's position in the newest-first history."""
+    raw = f"{calculation.created_at.isoformat()}|{calculation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """Decode a history cursor into (created_at, id), or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, calc_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(calc_id)
+    except ValueError:
+        return None
+
+
 @routes.route("/tax-history", methods=["GET"])
 @jwt_required()
+@read_replica
 def tax_history() -> tuple:
-    """Get user's tax calculation history."""
+    """
+    Get user's tax calculation history, newest first.
+
+    Pages are selected either by `page` (offset pagination) or, for constant-time
+    deep pages, by a `before`/`after` cursor taken from a previous response. Passing
+    an empty `before` starts cursor pagination at the newest calculation. The exact
+    total is only counted when `include_total` is set (the default in page mode).
+    """
     current_user_identity = get_jwt_identity()
-    user = User.query.filter_by(username=current_user_identity).first()
+    user = get_current_user()
     
     if not user:
-        logger.error(f"User not found: {current_user_identity}")
+        logger.error("User not found: %s", current_user_identity)
         return jsonify({"message": "User not found."}), 404
     
     try:
+        # Make this worker's buffered calculations visible before reading
+        if history_buffer.running:
+            history_buffer.flush()
+
+        # The page only changes when the history does: revalidate with one primary key read
+        etag = make_etag("tax-history", user.id, get_history_version(user.id), sorted(request.args.items()))
+        cached = not_modified(etag, HISTORY_CACHE_CONTROL)
+        if cached:
+            return cached
+
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        
-        calculations = TaxCalculation.query.filter_by(user_id=user.id)\
-            .order_by(TaxCalculation.created_at.desc())\
-            .paginate(page=page, per_page=per_page)
-        
-        logger.info(f"Tax history retrieved for user {current_user_identity}")
-        return jsonify({
-            'total': calculations.total,
-            'pages': calculations.pages,
-            'current_page': page,
-            'calculations': [calc.to_dict() for calc in calculations.items]
-        }), 200
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+        before = request.args.get('before')
+        after = request.args.get('after')
+        cursor_mode = before is not None or after is not None
+        include_total = request.args.get('include_total', 'false' if cursor_mode else 'true').lower() in ('1', 'true', 'yes')
+
+        query = TaxCalculation.query.filter_by(user_id=user.id)
+        newest_first = (TaxCalculation.created_at.desc(), TaxCalculation.id.desc())
+        response = {}
+
+        if cursor_mode:
+            cursor = decode_history_cursor(after or before) if (after or before) else None
+            if (after or before) and cursor is None:
+                return jsonify({"message": "Invalid cursor."}), 400
+
+            if after:
+                # Newer than the cursor: seek upwards, then restore newest-first order
+                created_at, calc_id = cursor
+                rows = query.filter(or_(
+                    TaxCalculation.created_at > created_at,
+                    and_(TaxCalculation.created_at == created_at, TaxCalculation.id > calc_id)
+                )).order_by(TaxCalculation.created_at.asc(), TaxCalculation.id.asc()).limit(per_page + 1).all()
+                has_newer, has_older = len(rows) > per_page, True
+                calculations = list(reversed(rows[:per_page]))
+            else:
+                if cursor:
+                    created_at, calc_id = cursor
+                    query = query.filter(or_(
+                        TaxCalculation.created_at < created_at,
+                        and_(TaxCalculation.created_at == created_at, TaxCalculation.id < calc_id)
+                    ))
+                rows = query.order_by(*newest_first).limit(per_page + 1).all()
+                has_newer, has_older = cursor is not None, len(rows) > per_page
+                calculations = rows[:per_page]
+
+            response['next_cursor'] = encode_history_cursor(calculations[-1]) if has_older and calculations else None
+            response['prev_cursor'] = encode_history_cursor(calculations[0]) if has_newer and calculations else None
+        else:
+            page = max(page, 1)
+            rows = query.order_by(*newest_first).offset((page - 1) * per_page).limit(per_page + 1).all()
+            calculations = rows[:per_page]
+            response['current_page'] = page
+            response['has_next'] = len(rows) > per_page
+
+        if include_total:
+            total = TaxCalculation.query.filter_by(user_id=user.id).count()
+            response['total'] = total
+            response['pages'] = (total + per_page - 1) // per_page
+        response['calculations'] = [calc.to_dict() for calc in calculations]
+
+        logger.info("Tax history retrieved for user %s", current_user_identity)
+        return with_validators(jsonify(response), etag, HISTORY_CACHE_CONTROL), 200
     except Exception as e:
-        logger.error(f"Error retrieving tax history: {e}")
+        logger.error("Error retrieving tax history: %s", e)
         return jsonify({"message": "An error occurred while retrieving history."}), 500
 
 
+@routes.route("/tax-history/summary", methods=["GET"])
+@jwt_required()
+@read_replica
+def tax_history_summary() -> tuple:
+    """Get totals of the user's tax history overall, per regime and per financial year."""
+    current_user_identity = get_jwt_identity()
+    user = get_current_user()
+
+    if not user:
+        logger.error("User not found: %s", current_user_identity)
+        return jsonify({"message": "User not found."}), 404
+
+    try:
+        if history_buffer.running:
+            history_buffer.flush()
+
+        etag = make_etag("tax-history-summary", user.id, get_history_version(user.id))
+        cached = not_modified(etag, HISTORY_CACHE_CONTROL)
+        if cached:
+            return cached
+
+        summary = summarize_history(user.id)
+        logger.info("Tax history summary retrieved for user %s", current_user_identity)
+        return with_validators(jsonify(summary), etag, HISTORY_CACHE_CONTROL), 200
+    except Exception as e:
+        logger.error("Error retrieving tax history summary: %s", e)
+        return jsonify({"message": "An error occurred while retrieving the history summary."}), 500
+
+
 @routes.route("/tax-history/<int:calc_id>", methods=["DELETE"])
 @jwt_required()
 def delete_tax_calculation(calc_id: int) -> tuple:
     """Delete a specific tax calculation from history."""
     current_user_identity = get_jwt_identity()
-    user = User.query.filter_by(username=current_user_identity).first()
+    user = get_current_user()
     
     if not user:
         return jsonify({"message": "User not found."}), 404
     
     try:
+        if history_buffer.running:
+            history_buffer.flush()
         calculation = TaxCalculation.query.filter_by(id=calc_id, user_id=user.id).first()
         if not calculation:
             return jsonify({"message": "Calculation not found."}), 404
         
         db.session.delete(calculation)
+        apply_to_rollups([calculation], sign=-1)
         db.session.commit()
-        logger.info(f"Tax calculation deleted for user {current_user_identity}: calc_id={calc_id}")
+        logger.info("Tax calculation deleted for user %s: calc_id=%s", current_user_identity, calc_id)
         return jsonify({"message": "Calculation deleted successfully."}), 200
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting tax calculation: {e}")
+        logger.error("Error deleting tax calculation: %s", e)
         return jsonify({"message": "An error occurred while deleting calculation."}), 500
 
 
 @routes.route("/user-info", methods=["GET"])
 @jwt_required()
+@read_replica
 def user_info() -> tuple:
     """Get current user information."""
     current_user_identity = get_jwt_identity()
-    user = User.query.filter_by(username=current_user_identity).first()
+    user = get_current_user()
     if user:
-        logger.info(f"User info requested for: {current_user_identity}")
+        logger.info("User info requested for: %s", current_user_identity)
         return jsonify({"username": user.username, "created_at": user.created_at.isoformat()}), 200
     else:
-        logger.error(f"User not found for identity: {current_user_identity}")
+        logger.error("User not found for identity: %s", current_user_identity)
         return jsonify({"message": "User not found."}), 404
\ No newline at end of file
@@ -0,0 +1,31 @@
+import time
+from typing import Dict
+
+
+class StartupTimer:
+    """
+    Records how long each phase of the backend's startup takes.
+
+    Each mark() closes the phase that began at the previous mark (or when this
+    module was imported), so the phases add up to the total startup time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """End the current phase under the given name."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def report(self) -> Dict[str, float]:
+        """Milliseconds spent in each phase, plus 'total'."""
+        report = {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()}
+        report["total"] = round((self._last - self.started) * 1000, 2)
+        return report
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,197 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from flask import has_request_context, request
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse 'routes=0.1,auth=0.5' into {logger name: fraction of INFO/DEBUG records kept}."""
+    rates = {}
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = part.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the INFO and DEBUG records of selected loggers.
+
+    Rates apply to a logger and its children, the most specific name winning.
+    Warnings and errors are always kept. Kept records carry their sample rate,
+    so counts can be scaled back up downstream.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._cache: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        if name not in self._cache:
+            rate, candidate = None, name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._cache[name] = rate
+        return self._cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None:
+            return True
+        record.sample_rate = rate
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the method, path and endpoint of the current request, if any, to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.request_method = request.method
+            record.request_path = request.path
+            record.endpoint = request.endpoint
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats every record on the logging thread before queuing
+    it; here only an exception traceback is rendered up front (its frames are
+    only valid now), and the message is built from msg and args by the listener.
+    When the queue is full, INFO and DEBUG records are dropped and counted
+    instead of blocking the request; warnings and errors wait briefly for room
+    and are otherwise written synchronously to the overflow handler.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: Optional[logging.Handler] = None,
+                 block_timeout: float = 0.1):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put(record, timeout=self.block_timeout)
+        except queue.Full:
+            if self.overflow is not None:
+                self.overflow.handle(record)
+            else:
+                self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request fields and any `extra` values."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LogPipeline:
+    """
+    Root logging through a bounded in-memory queue drained by a listener thread.
+
+    Request threads only filter a record and put it on the queue; formatting
+    and writing to the output stream happen on the listener thread.
+    """
+
+    def __init__(self):
+        self.handler: Optional[DeferredQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.output: Optional[logging.Handler] = None
+        self.queue_size = 10000
+
+    def configure(self, level: str, log_format: str, sampling: str, queue_size: int) -> None:
+        """
+        Route root logging through the queue.
+
+        Args:
+            level: Root log level, e.g. 'INFO'
+            log_format: 'json' for one JSON object per line, 'text' for the plain format
+            sampling: Per-logger sample rates for INFO/DEBUG records, e.g. 'routes=0.1,auth=0.5'
+            queue_size: Records held for the listener before INFO/DEBUG ones are dropped
+        """
+        self.stop()
+        self.queue_size = queue_size
+        self.output = logging.StreamHandler(sys.stderr)
+        self.output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+        self.handler = DeferredQueueHandler(queue.Queue(queue_size), overflow=self.output)
+        self.handler.addFilter(SamplingFilter(parse_sampling(sampling)))
+        self.handler.addFilter(RequestContextFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level.upper())
+        self._start_listener()
+
+    def _start_listener(self) -> None:
+        self.listener = logging.handlers.QueueListener(self.handler.queue, self.output, respect_handler_level=True)
+        self.listener.start()
+
+    def after_fork(self) -> None:
+        """Give a forked child its own queue and listener; the parent's thread does not exist there."""
+        if self.listener is None:
+            return
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.handler.dropped = 0
+        self._start_listener()
+
+    def stop(self) -> None:
+        """Write out queued records and stop the listener."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+log_pipeline = LogPipeline()
+os.register_at_fork(after_in_child=log_pipeline.after_fork)
+atexit.register(log_pipeline.stop)
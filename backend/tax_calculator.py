@@ -1,6 +1,62 @@
-from typing import Dict, List, Tuple, Optional
+from bisect import bisect_left
+from itertools import zip_longest
+from typing import Dict, List, Tuple, Optional, Sequence, Union
 
-def calculate_tax(income: float, regime: str, deductions: float = 0, rebates: Dict = None) -> Dict:
+import numpy as np
+
+from result_cache import ResultCache
+from tax_rules import RuleSet, SlabTable, registry, get_year_rules, get_regime_rules
+
+# Results of calculate_tax, compare_tax_regimes and calculate_tax_slabs_breakdown,
+# keyed on normalized inputs and the rules version; emptied whenever the rules reload
+result_cache = ResultCache()
+registry.on_reload(lambda rules: result_cache.clear())
+
+
+def _typed(value) -> Tuple:
+    # Results echo the inputs back, so 700000 and 700000.0 (or True and 1) need their own entries
+    return (type(value), value)
+
+
+def _tax_key(income, regime, deductions=0, rebates=None, financial_year=None, rules=None) -> Tuple:
+    # Rebates are validated non-negative, so the order they are applied in cannot change the result
+    rebate_items = tuple(sorted((name, _typed(amount)) for name, amount in rebates.items())) if rebates else ()
+    return ((rules or registry.rules).version, financial_year, regime, _typed(income), _typed(deductions), rebate_items)
+
+
+def _comparison_key(income, deductions=0, financial_year=None, rules=None) -> Tuple:
+    return ((rules or registry.rules).version, financial_year, _typed(income), _typed(deductions))
+
+
+def _breakdown_key(income, regime, financial_year=None, rules=None) -> Tuple:
+    return ((rules or registry.rules).version, financial_year, regime, _typed(income))
+
+
+def _copy_comparison(comparison: Dict) -> Dict:
+    return {**comparison, "old_regime": dict(comparison["old_regime"]), "new_regime": dict(comparison["new_regime"])}
+
+
+def base_tax(table: SlabTable, taxable_income: float) -> float:
+    """
+    Tax on taxable income before rebates, surcharge and cess.
+
+    Args:
+        table: Compiled slabs of the regime
+        taxable_income: Income after deductions
+
+    Returns:
+        Base tax amount
+    """
+    index = bisect_left(table.lower_bounds, taxable_income) - 1
+    if index < 0:
+        return 0.0
+    slab = table.slabs[index]
+    return table.cumulative_tax[index] + (min(taxable_income, slab.upper) - slab.lower) * slab.rate
+
+
+@result_cache.memoize(_tax_key, copy=dict)
+def calculate_tax(income: float, regime: str, deductions: float = 0, rebates: Dict = None,
+                  financial_year: Optional[str] = None, rules: Optional[RuleSet] = None) -> Dict:
     """
     Calculates income tax based on the provided income and tax regime (old or new).
     Supports deductions and tax rebates.
@@ -10,45 +66,19 @@ def calculate_tax(income: float, regime: str, deductions: float = 0, rebates: Di
         regime: Tax regime ('old' or 'new')
         deductions: Standard deductions or section 80C/80D claims
         rebates: Dictionary of applicable rebates
+        financial_year: Financial year whose rules apply (default year if omitted)
+        rules: RuleSet to calculate with (the active one if omitted)
     
     Returns:
         Dictionary with detailed tax breakdown including tax amount, effective rate, etc.
     
     Raises:
-        ValueError: If regime is not 'old' or 'new'
-    """
-    tax_slabs = {
-        "old": [
-            (0, 250000, 0),
-            (250001, 500000, 0.05),
-            (500001, 1000000, 0.20),
-            (1000001, float('inf'), 0.30)
-        ],
-        "new": [
-            (0, 250000, 0),
-            (250001, 500000, 0.05),
-            (500001, 750000, 0.10),
-            (750001, 1000000, 0.15),
-            (1000001, 1250000, 0.20),
-            (1250001, 1500000, 0.25),
-            (1500001, float('inf'), 0.30)
-        ]
-    }
-
-    if regime not in tax_slabs:
-        raise ValueError("Invalid tax regime specified. Must be 'old' or 'new'.")
+        ValueError: If regime is not 'old' or 'new', or the financial year is unknown
+    """
+    rules = get_regime_rules(regime, financial_year, rules)
 
-    selected_slabs = tax_slabs[regime]
     taxable_income = max(0, income - deductions)
-    total_tax = 0.0
-
-    for lower_bound, upper_bound, rate in selected_slabs:
-        if taxable_income <= lower_bound:
-            break
-
-        taxable_in_slab = min(taxable_income, upper_bound) - max(lower_bound, 0)
-        if taxable_in_slab > 0:
-            total_tax += taxable_in_slab * rate
+    total_tax = base_tax(rules.slabs, taxable_income)
 
     # Apply rebates if available
     if rebates:
@@ -57,14 +87,11 @@ def calculate_tax(income: float, regime: str, deductions: float = 0, rebates: Di
 
     # Add surcharge and cess if income exceeds threshold
     surcharge = 0
-    if income > 5000000:
-        surcharge = total_tax * 0.25
-    elif income > 2000000:
-        surcharge = total_tax * 0.15
-    elif income > 1000000:
-        surcharge = total_tax * 0.10
+    band = bisect_left(rules.surcharge_thresholds, income)
+    if band:
+        surcharge = total_tax * rules.surcharge_rates[band - 1]
 
-    health_education_cess = (total_tax + surcharge) * 0.04
+    health_education_cess = (total_tax + surcharge) * rules.cess_rate
 
     final_tax = total_tax + surcharge + health_education_cess
 
@@ -83,19 +110,25 @@ def calculate_tax(income: float, regime: str, deductions: float = 0, rebates: Di
     }
 
 
-def compare_tax_regimes(income: float, deductions: float = 0) -> Dict:
+@result_cache.memoize(_comparison_key, copy=_copy_comparison)
+def compare_tax_regimes(income: float, deductions: float = 0, financial_year: Optional[str] = None,
+                        rules: Optional[RuleSet] = None) -> Dict:
     """
     Compare tax liability under old and new regimes.
     
     Args:
         income: Annual income
         deductions: Deductions applicable (for old regime)
+        financial_year: Financial year whose rules apply (default year if omitted)
+        rules: RuleSet to calculate with (the active one if omitted)
     
     Returns:
         Comparison dictionary with both regime calculations
     """
-    old_regime = calculate_tax(income, "old", deductions)
-    new_regime = calculate_tax(income, "new", 0)  # New regime has standard deduction
+    # Both regimes come from one RuleSet even if the rules reload meanwhile
+    rules = rules or registry.rules
+    old_regime = calculate_tax(income, "old", deductions, financial_year=financial_year, rules=rules)
+    new_regime = calculate_tax(income, "new", 0, financial_year=financial_year, rules=rules)  # New regime has standard deduction
     
     return {
         "old_regime": old_regime,
@@ -105,57 +138,436 @@ def compare_tax_regimes(income: float, deductions: float = 0) -> Dict:
     }
 
 
-def calculate_tax_slabs_breakdown(income: float, regime: str) -> List[Dict]:
+@result_cache.memoize(_breakdown_key, copy=lambda breakdown: [dict(slab) for slab in breakdown])
+def calculate_tax_slabs_breakdown(income: float, regime: str, financial_year: Optional[str] = None,
+                                  rules: Optional[RuleSet] = None) -> List[Dict]:
     """
     Generate detailed breakdown of income across tax slabs.
     
     Args:
         income: Annual income
         regime: Tax regime
+        financial_year: Financial year whose slabs apply (default year if omitted)
+        rules: RuleSet to read the slabs from (the active one if omitted)
     
     Returns:
         List of slab breakdowns with tax calculation
     """
-    tax_slabs = {
-        "old": [
-            {"range": "0 - 2.5L", "from": 0, "to": 250000, "rate": 0},
-            {"range": "2.5L - 5L", "from": 250001, "to": 500000, "rate": 0.05},
-            {"range": "5L - 10L", "from": 500001, "to": 1000000, "rate": 0.20},
-            {"range": "10L+", "from": 1000001, "to": float('inf'), "rate": 0.30}
-        ],
-        "new": [
-            {"range": "0 - 2.5L", "from": 0, "to": 250000, "rate": 0},
-            {"range": "2.5L - 5L", "from": 250001, "to": 500000, "rate": 0.05},
-            {"range": "5L - 7.5L", "from": 500001, "to": 750000, "rate": 0.10},
-            {"range": "7.5L - 10L", "from": 750001, "to": 1000000, "rate": 0.15},
-            {"range": "10L - 12.5L", "from": 1000001, "to": 1250000, "rate": 0.20},
-            {"range": "12.5L - 15L", "from": 1250001, "to": 1500000, "rate": 0.25},
-            {"range": "15L+", "from": 1500001, "to": float('inf'), "rate": 0.30}
-        ]
-    }
+    rules = get_year_rules(financial_year, rules).get(regime)
+    if rules is None:
+        return []
+    table = rules.slabs
 
-    slabs = tax_slabs.get(regime, [])
     breakdown = []
-
-    for slab in slabs:
-        if income <= slab["from"]:
-            break
-        
+    for slab in table.slabs[:bisect_left(table.lower_bounds, income)]:
         # Calculate income in this slab
-        lower = max(slab["from"], 0)
-        upper = min(income, slab["to"])
+        lower = max(slab.lower, 0)
+        upper = min(income, slab.upper)
         income_in_slab = max(0, upper - lower)
-        tax_in_slab = max(0, income_in_slab * slab["rate"])
-        
+        tax_in_slab = max(0, income_in_slab * slab.rate)
+
         breakdown.append({
-            "range": slab["range"],
+            "range": slab.label,
             "income_in_slab": round(income_in_slab, 2),
-            "rate": f"{slab['rate']*100:.0f}%",
+            "rate": f"{slab.rate*100:.0f}%",
             "tax": round(tax_in_slab, 2)
         })
 
     return breakdown
 
+
+def calculate_tax_full(income: float, regime: str, deductions: float = 0, rebates: Optional[Dict] = None,
+                       financial_year: Optional[str] = None) -> Dict:
+    """
+    Everything the calculate page shows for one input: the calculation, its slab
+    breakdown and the regime comparison.
+
+    The parts share the memoized calculate_tax results, so the comparison reuses the
+    calculation whenever their inputs coincide. All three use the same RuleSet.
+
+    Args:
+        income: Annual income
+        regime: Tax regime ('old' or 'new')
+        deductions: Deductions applicable
+        rebates: Dictionary of rebates applicable
+        financial_year: Financial year whose rules apply (default year if omitted)
+
+    Returns:
+        Dictionary with 'calculation', 'slabs' and 'comparison'
+    """
+    rules = registry.rules
+    return {
+        "calculation": calculate_tax(income, regime, deductions, rebates, financial_year, rules),
+        "slabs": calculate_tax_slabs_breakdown(income, regime, financial_year, rules),
+        "comparison": compare_tax_regimes(income, deductions, financial_year, rules)
+    }
+
+
+def _total_tax_unrounded(rules, income: float, deductions: float) -> float:
+    """Base tax plus surcharge and cess, without rebates or rounding."""
+    total_tax = base_tax(rules.slabs, max(0, income - deductions))
+    band = bisect_left(rules.surcharge_thresholds, income)
+    surcharge = total_tax * rules.surcharge_rates[band - 1] if band else 0
+    return total_tax + surcharge + (total_tax + surcharge) * rules.cess_rate
+
+
+def _taxable_income_for_base_tax(table: SlabTable, target: float) -> float:
+    """Smallest taxable income whose base tax reaches `target` (inverse of base_tax)."""
+    for slab, accrued in zip(table.slabs, table.cumulative_tax):
+        if slab.rate > 0 and target <= accrued + (slab.upper - slab.lower) * slab.rate:
+            return slab.lower + (target - accrued) / slab.rate
+    return float('inf')
+
+
+def _regime_winners(difference, start: float, end: Optional[float]) -> List[Tuple[float, Optional[float], str]]:
+    """
+    Split a segment on which `difference` (old minus new tax) is linear into the
+    parts where each regime is recommended. Ties go to the new regime, as in
+    compare_tax_regimes.
+    """
+    width = (end - start) if end is not None else 1000000
+    first, second = start + width / 4, start + width * 3 / 4
+    first_value, second_value = difference(first), difference(second)
+    slope = (second_value - first_value) / (second - first)
+
+    def winner(value: float) -> str:
+        return "old" if value < -1e-6 else "new"
+
+    if abs(slope) > 1e-12:
+        crossing = first - first_value / slope
+        if start < crossing and (end is None or crossing < end):
+            return [
+                (start, crossing, winner(first_value + slope * ((start + crossing) / 2 - first))),
+                (crossing, end, winner(first_value + slope * (crossing + 1 - first)))
+            ]
+    return [(start, end, winner(first_value + slope * ((start + (end if end is not None else first)) / 2 - first)))]
+
+
+@result_cache.memoize(_comparison_key, copy=lambda solution: {**solution, "income_ranges": [dict(r) for r in solution["income_ranges"]]})
+def solve_regime_breakeven(income: float, deductions: float = 0, financial_year: Optional[str] = None,
+                           rules: Optional[RuleSet] = None) -> Dict:
+    """
+    Solve where the old and new regimes break even, without sampling.
+
+    Both regimes' tax is piecewise linear in taxable income, so the deduction at
+    which the old regime matches the new one is found by inverting the old slab
+    table at the new regime's tax, and the income ranges where each regime wins
+    are found by solving the linear difference between consecutive breakpoints.
+
+    Args:
+        income: Annual income used for the breakeven deduction
+        deductions: Deductions (old regime) used for the income ranges
+        financial_year: Financial year whose rules apply (default year if omitted)
+        rules: RuleSet to solve with (the active one if omitted)
+
+    Returns:
+        Dictionary with the breakeven deduction and the income ranges per regime
+    """
+    rule_set = rules or registry.rules
+    old_rules = get_regime_rules("old", financial_year, rule_set)
+    new_rules = get_regime_rules("new", financial_year, rule_set)
+
+    # Old regime wins once its base tax, grossed up by its surcharge and cess,
+    # drops below the new regime's total tax
+    new_total = _total_tax_unrounded(new_rules, income, 0)
+    band = bisect_left(old_rules.surcharge_thresholds, income)
+    gross_up = (1 + (old_rules.surcharge_rates[band - 1] if band else 0)) * (1 + old_rules.cess_rate)
+    breakeven_deduction = None
+    if new_total > 0:
+        taxable = _taxable_income_for_base_tax(old_rules.slabs, new_total / gross_up)
+        breakeven_deduction = round(max(0, income - taxable), 2)
+
+    # Between these incomes both regimes' tax is linear, so their difference is too
+    breakpoints = {0.0}
+    for rules, shift in ((old_rules, deductions), (new_rules, 0)):
+        for slab in rules.slabs.slabs:
+            breakpoints.update((slab.lower + shift, slab.upper + shift))
+        breakpoints.update(rules.surcharge_thresholds)
+    breakpoints = sorted(point for point in breakpoints if 0 <= point < float('inf'))
+
+    def difference(value: float) -> float:
+        return _total_tax_unrounded(old_rules, value, deductions) - _total_tax_unrounded(new_rules, value, 0)
+
+    income_ranges = []
+    for start, end in zip(breakpoints, breakpoints[1:] + [None]):
+        for part_start, part_end, regime in _regime_winners(difference, start, end):
+            if income_ranges and income_ranges[-1]["recommended_regime"] == regime:
+                income_ranges[-1]["to"] = None if part_end is None else round(part_end, 2)
+            else:
+                income_ranges.append({
+                    "from": round(part_start, 2),
+                    "to": None if part_end is None else round(part_end, 2),
+                    "recommended_regime": regime
+                })
+
+    return {
+        "income": income,
+        "deductions": deductions,
+        "financial_year": financial_year or rule_set.default_year,
+        "new_regime_total_tax": round(new_total, 2),
+        "breakeven_deduction": breakeven_deduction,
+        "income_ranges": income_ranges
+    }
+
+
+# Fields of calculate_tax_batch results, in calculate_tax order
+BATCH_FIELDS = (
+    "gross_income", "deductions", "taxable_income", "base_tax", "surcharge", "health_education_cess",
+    "total_tax", "effective_tax_rate", "tax_per_month", "take_home_annual", "take_home_monthly"
+)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round an array to 2 decimals exactly like the builtin round(x, 2).
+
+    np.round scales by 100 before rounding, so values a hair either side of a
+    half-paisa can round the wrong way. The rounding error of the scaling is
+    recovered with a Dekker split and used to pick the same side as round(),
+    with exact ties going to the even neighbour.
+    """
+    scaled = values * 100
+    floor = np.floor(scaled)
+    split = values * 134217729.0  # 2**27 + 1
+    high = split - (split - values)
+    low = values - high
+    error = (high * 100 - scaled) + low * 100
+    distance = (scaled - (floor + 0.5)) + error
+    round_up = (distance > 0) | ((distance == 0) & (np.floor(floor / 2) != floor / 2))
+    return np.where(round_up, floor + 1, floor) / 100
+
+
+def _base_tax_array(table: SlabTable, taxable_income: np.ndarray) -> np.ndarray:
+    """Vectorized base_tax: one searchsorted over the slab bounds plus one multiply."""
+    index = np.searchsorted(table.lower_array, taxable_income, side="left") - 1
+    in_slab = np.maximum(index, 0)
+    partial = np.minimum(taxable_income, table.upper_array[in_slab]) - table.lower_array[in_slab]
+    tax = table.cumulative_array[in_slab] + partial * table.rate_array[in_slab]
+    return np.where(index >= 0, tax, 0.0)
+
+
+def calculate_tax_batch(incomes: Sequence[float], regimes: Union[str, Sequence[str]],
+                        deductions: Union[float, Sequence[float]] = 0,
+                        rebates: Optional[Union[np.ndarray, Sequence[Sequence[float]]]] = None,
+                        financial_years: Union[None, str, Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized version of calculate_tax over whole arrays of records.
+
+    Produces exactly the same figures as calling calculate_tax once per record,
+    but evaluates every slab, surcharge band and the cess over NumPy arrays.
+
+    Args:
+        incomes: Annual income per record
+        regimes: Tax regime per record, or a single regime for all records
+        deductions: Deductions per record, or a single amount for all records
+        rebates: Rebate amounts per record, one row per record and one column per
+            rebate (zero-padded), applied left to right as calculate_tax does; a 1-D
+            array is one rebate per record
+        financial_years: Financial year per record, or a single year for all records
+            (default year if omitted)
+
+    Returns:
+        Dictionary mapping every calculate_tax field to an array with one entry per record
+
+    Raises:
+        ValueError: If any regime or financial year is unknown or the inputs differ in length
+    """
+    rule_set = registry.rules
+    income = np.asarray(incomes, dtype=np.float64)
+    count = income.shape[0]
+    regime = np.broadcast_to(np.asarray(regimes, dtype=str), (count,))
+    deduction = np.broadcast_to(np.asarray(deductions, dtype=np.float64), (count,))
+    rebate = np.zeros((count, 0)) if rebates is None else np.asarray(rebates, dtype=np.float64)
+    if rebate.ndim == 1:
+        rebate = rebate[:, None]
+    if rebate.shape[0] != count:
+        raise ValueError("rebates must have one row per income.")
+
+    if financial_years is None or isinstance(financial_years, str):
+        year_names = [financial_years or rule_set.default_year]
+        year = np.broadcast_to(np.asarray(year_names[0], dtype=str), (count,))
+    else:
+        year = np.asarray(financial_years, dtype=str)
+        year_names = np.unique(year)
+
+    taxable_income = np.maximum(0, income - deduction)
+    total_tax = np.zeros(count)
+    surcharge_rate = np.zeros(count)
+    cess_rate = np.zeros(count)
+    resolved = np.zeros(count, dtype=bool)
+
+    for year_name in year_names:
+        year_rules = get_year_rules(str(year_name), rule_set)
+        for regime_name, rules in year_rules.items():
+            mask = (year == year_name) & (regime == regime_name)
+            if not mask.any():
+                continue
+            resolved |= mask
+            total_tax[mask] = _base_tax_array(rules.slabs, taxable_income[mask])
+            cess_rate[mask] = rules.cess_rate
+            if rules.surcharge_thresholds:
+                band = np.searchsorted(rules.surcharge_threshold_array, income[mask], side="left")
+                rates = rules.surcharge_rate_array[np.maximum(band - 1, 0)]
+                surcharge_rate[mask] = np.where(band > 0, rates, 0.0)
+
+    if not resolved.all():
+        raise ValueError("Invalid tax regime specified. Must be 'old' or 'new'.")
+
+    # Apply rebates one column at a time, clamping at zero after each like calculate_tax
+    for rebate_amount in rebate.T:
+        total_tax = np.maximum(0, total_tax - rebate_amount)
+
+    surcharge = total_tax * surcharge_rate
+    health_education_cess = (total_tax + surcharge) * cess_rate
+    final_tax = total_tax + surcharge + health_education_cess
+
+    effective_rate = np.zeros(count)
+    np.divide(final_tax, income, out=effective_rate, where=income > 0)
+    effective_rate = np.where(income > 0, _round2(effective_rate * 100), 0)
+
+    return {
+        "gross_income": income,
+        "deductions": np.array(deduction),
+        "taxable_income": taxable_income,
+        "base_tax": _round2(total_tax),
+        "surcharge": _round2(surcharge),
+        "health_education_cess": _round2(health_education_cess),
+        "total_tax": _round2(final_tax),
+        "effective_tax_rate": effective_rate,
+        "tax_per_month": _round2(final_tax / 12),
+        "take_home_annual": _round2(income - final_tax),
+        "take_home_monthly": _round2((income - final_tax) / 12)
+    }
+
+
+def warm_up() -> None:
+    """
+    Run every compiled regime of every financial year through the vectorized
+    calculator once.
+
+    Called before a server forks its workers, so they inherit warmed NumPy code
+    paths instead of each paying for them on its first request.
+    """
+    rules = registry.rules
+    for year, regimes in rules.years.items():
+        for regime in regimes:
+            calculate_tax_batch([0.0, 1500000.0, 60000000.0], regime, financial_years=year)
+
+
+def records_to_columns(records: Sequence[Dict], default_year: Optional[str] = None) -> Tuple[List, List, List, np.ndarray, List]:
+    """
+    Collect /calculate-tax style records into calculate_tax_batch arguments in one pass.
+
+    Args:
+        records: Dicts with income, regime and optional deductions, rebates and financial_year
+        default_year: Financial year for records without one (rules default if omitted)
+
+    Returns:
+        (incomes, regimes, deductions, rebates, financial years): lists with one entry
+        per record, and rebates as a zero-padded (records, rebates) array
+    """
+    default_year = default_year or registry.rules.default_year
+    incomes, regimes, deductions, rebates, years = [], [], [], [], []
+    for record in records:
+        incomes.append(record["income"])
+        regimes.append(record["regime"])
+        deductions.append(record.get("deductions", 0))
+        record_rebates = record.get("rebates")
+        rebates.append(tuple(record_rebates.values()) if record_rebates else ())
+        years.append(record.get("financial_year") or default_year)
+    # zip_longest transposes the ragged rebate tuples into zero-padded columns in C
+    rebate_columns = list(zip_longest(*rebates, fillvalue=0.0))
+    rebate_matrix = np.array(rebate_columns, dtype=np.float64).T if rebate_columns else np.zeros((len(records), 0))
+    return incomes, regimes, deductions, rebate_matrix, years
+
+
+def calculate_tax_records(records: Sequence[Dict], default_year: Optional[str] = None) -> List[Dict]:
+    """
+    Calculate a list of /calculate-tax style records in one batch.
+
+    Args:
+        records: Dicts with income, regime and optional deductions, rebates and financial_year
+        default_year: Financial year for records without one (rules default if omitted)
+
+    Returns:
+        One calculate_tax-style result dict per record, in input order
+    """
+    return batch_results_to_records(calculate_tax_batch(*records_to_columns(records, default_year)))
+
+
+def _curve_breakpoints(total_tax: np.ndarray) -> np.ndarray:
+    """
+    Indices of the sampled points needed to redraw a piecewise-linear curve exactly.
+
+    A point is kept when the second difference around it is non-zero, i.e. the
+    curve bends or jumps next to it; the first and last points are always kept.
+    The tolerance absorbs the paisa rounding of the sampled values.
+    """
+    keep = np.zeros(total_tax.shape[0], dtype=bool)
+    keep[[0, -1]] = True
+    keep[np.flatnonzero(np.abs(np.diff(total_tax, 2)) > 0.025) + 1] = True
+    return np.flatnonzero(keep)
+
+
+def calculate_tax_curve(incomes: np.ndarray, regimes: Sequence[str], deductions: float = 0,
+                        financial_year: Optional[str] = None, downsample: bool = True) -> Dict:
+    """
+    Tax, take-home and effective rate over a range of incomes, for charting.
+
+    Args:
+        incomes: Ascending incomes to evaluate
+        regimes: Regimes to evaluate ('old' and/or 'new')
+        deductions: Deductions applied at every income
+        financial_year: Financial year whose rules apply (default year if omitted)
+        downsample: Keep only the points where the tax curve bends; tax and take-home
+            are linear in between, so they can be interpolated without loss
+
+    Returns:
+        Dictionary mapping each regime to arrays of incomes and results
+    """
+    curves = {}
+    for regime in regimes:
+        results = calculate_tax_batch(incomes, regime, deductions, financial_years=financial_year)
+        points = _curve_breakpoints(results["total_tax"]) if downsample and len(incomes) > 2 else slice(None)
+        curves[regime] = {
+            "incomes": results["gross_income"][points].tolist(),
+            "total_tax": results["total_tax"][points].tolist(),
+            "take_home_annual": results["take_home_annual"][points].tolist(),
+            "take_home_monthly": results["take_home_monthly"][points].tolist(),
+            "effective_tax_rate": results["effective_tax_rate"][points].tolist()
+        }
+    return curves
+
+
+def batch_results_to_records(results: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Convert calculate_tax_batch output into one calculate_tax-style dict per record.
+
+    Args:
+        results: Column arrays returned by calculate_tax_batch
+
+    Returns:
+        List of per-record result dictionaries
+    """
+    return [
+        {
+            "gross_income": gross_income,
+            "deductions": deductions,
+            "taxable_income": taxable_income,
+            "base_tax": base_tax,
+            "surcharge": surcharge,
+            "health_education_cess": health_education_cess,
+            "total_tax": total_tax,
+            "effective_tax_rate": effective_tax_rate,
+            "tax_per_month": tax_per_month,
+            "take_home_annual": take_home_annual,
+            "take_home_monthly": take_home_monthly
+        }
+        for (gross_income, deductions, taxable_income, base_tax, surcharge, health_education_cess, total_tax,
+             effective_tax_rate, tax_per_month, take_home_annual, take_home_monthly)
+        in zip(*(results[field].tolist() for field in BATCH_FIELDS))
+    ]
+
 # Example usage (for testing)
 # print(f"Old regime tax for 700000: {calculate_tax(700000, 'old')}")
 # print(f"New regime tax for 700000: {calculate_tax(700000, 'new')}")
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tax_rules.json")
+
+
+class TaxSlab(NamedTuple):
+    """A single income slab: income above `lower` and up to `upper` is taxed at `rate`."""
+    lower: float
+    upper: float
+    rate: float
+    label: str
+
+
+class SlabTable(NamedTuple):
+    """
+    Slabs of one regime compiled for fast lookup.
+
+    `cumulative_tax[i]` is the tax accrued on every slab below slab `i`, so the base
+    tax for any taxable income is one bisect over `lower_bounds` plus one multiply.
+    The *_array fields hold the same data as read-only NumPy arrays for batch use.
+    """
+    slabs: Tuple[TaxSlab, ...]
+    lower_bounds: Tuple[float, ...]
+    cumulative_tax: Tuple[float, ...]
+    lower_array: np.ndarray
+    upper_array: np.ndarray
+    rate_array: np.ndarray
+    cumulative_array: np.ndarray
+
+
+class RegimeRules(NamedTuple):
+    """Compiled rules of one regime in one financial year."""
+    slabs: SlabTable
+    surcharge_thresholds: Tuple[float, ...]  # ascending; surcharge applies above each
+    surcharge_rates: Tuple[float, ...]
+    cess_rate: float
+    surcharge_threshold_array: np.ndarray
+    surcharge_rate_array: np.ndarray
+
+
+class RuleSet(NamedTuple):
+    """Every financial year loaded from one rules file."""
+    version: str
+    default_year: str
+    years: Mapping[str, Mapping[str, RegimeRules]]
+
+
+def _readonly_array(values) -> np.ndarray:
+    array = np.array(values, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+def compile_slabs(slabs: Sequence[TaxSlab]) -> SlabTable:
+    """
+    Compile slab definitions into a SlabTable with precomputed cumulative tax.
+
+    Args:
+        slabs: Slabs of one regime, ordered by lower bound
+
+    Returns:
+        Immutable SlabTable
+    """
+    slabs = tuple(slabs)
+    cumulative_tax = []
+    accrued = 0.0
+    for slab in slabs:
+        cumulative_tax.append(accrued)
+        accrued += (slab.upper - slab.lower) * slab.rate
+
+    return SlabTable(
+        slabs=slabs,
+        lower_bounds=tuple(slab.lower for slab in slabs),
+        cumulative_tax=tuple(cumulative_tax),
+        lower_array=_readonly_array([slab.lower for slab in slabs]),
+        upper_array=_readonly_array([slab.upper for slab in slabs]),
+        rate_array=_readonly_array([slab.rate for slab in slabs]),
+        cumulative_array=_readonly_array(cumulative_tax)
+    )
+
+
+def _compile_regime(year: str, regime: str, data: Dict) -> RegimeRules:
+    """Validate and compile the rules of one regime."""
+    slabs = [
+        TaxSlab(
+            slab["from"],
+            float('inf') if slab.get("to") is None else slab["to"],
+            slab["rate"],
+            slab.get("label", "")
+        )
+        for slab in data["slabs"]
+    ]
+    if not slabs or slabs[0].lower != 0:
+        raise ValueError(f"{year}/{regime}: slabs must start at 0")
+    for previous, slab in zip(slabs, slabs[1:]):
+        if slab.lower <= previous.lower or previous.upper > slab.lower:
+            raise ValueError(f"{year}/{regime}: slabs must be ordered and non-overlapping")
+
+    bands = sorted((band["above"], band["rate"]) for band in data.get("surcharge", []))
+    thresholds = tuple(threshold for threshold, _ in bands)
+    rates = tuple(rate for _, rate in bands)
+
+    return RegimeRules(
+        slabs=compile_slabs(slabs),
+        surcharge_thresholds=thresholds,
+        surcharge_rates=rates,
+        cess_rate=data.get("cess_rate", 0),
+        surcharge_threshold_array=_readonly_array(thresholds),
+        surcharge_rate_array=_readonly_array(rates)
+    )
+
+
+def load_rules(path: str) -> RuleSet:
+    """
+    Load and compile a rules file.
+
+    Args:
+        path: Path to the JSON rules file
+
+    Returns:
+        Compiled RuleSet covering every financial year in the file
+
+    Raises:
+        ValueError: If the file is malformed
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    try:
+        data = json.loads(raw)
+        years = MappingProxyType({
+            year: MappingProxyType({
+                regime: _compile_regime(year, regime, regime_data)
+                for regime, regime_data in regimes.items()
+            })
+            for year, regimes in data["years"].items()
+        })
+        default_year = data.get("default_year") or max(years)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed tax rules file {path}: {e}") from e
+
+    if default_year not in years:
+        raise ValueError(f"Default financial year {default_year} is not defined in {path}")
+
+    return RuleSet(
+        version=hashlib.sha256(raw).hexdigest()[:12],
+        default_year=default_year,
+        years=years
+    )
+
+
+class RuleRegistry:
+    """
+    Holds the active RuleSet and swaps it atomically when the rules file changes.
+
+    Readers take a reference to the current RuleSet and keep using it for the whole
+    calculation, so a reload never affects a request that is already in flight.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, reload_interval: float = 0):
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[RuleSet], None]] = []
+        self._path = path
+        self._reload_interval = reload_interval
+        self._mtime = os.path.getmtime(path)
+        self._last_check = time.monotonic()
+        self._rules = load_rules(path)
+
+    @property
+    def rules(self) -> RuleSet:
+        """Current RuleSet, reloading first if the rules file has changed."""
+        if self._reload_interval > 0 and time.monotonic() - self._last_check >= self._reload_interval:
+            self._check_for_changes()
+        return self._rules
+
+    def configure(self, path: str, reload_interval: float) -> None:
+        """Point the registry at a rules file and set how often it is checked for changes."""
+        self._reload_interval = reload_interval
+        if os.path.abspath(path) != os.path.abspath(self._path):
+            self._path = path
+            self.reload()
+
+    def on_reload(self, callback: Callable[[RuleSet], None]) -> None:
+        """Register a callback invoked with the new RuleSet after every reload."""
+        self._listeners.append(callback)
+
+    def reload(self) -> RuleSet:
+        """
+        Recompile the rules file and atomically replace the active RuleSet.
+
+        Raises:
+            ValueError: If the file is malformed; the previous rules stay active
+        """
+        with self._lock:
+            mtime = os.path.getmtime(self._path)
+            rules = load_rules(self._path)
+            self._rules, self._mtime = rules, mtime
+        logger.info("Tax rules loaded from %s: version=%s, years=%s", self._path, rules.version, list(rules.years))
+        for callback in self._listeners:
+            callback(rules)
+        return rules
+
+    def _check_for_changes(self) -> None:
+        self._last_check = time.monotonic()
+        try:
+            mtime = os.path.getmtime(self._path)
+            if mtime != self._mtime:
+                self._mtime = mtime  # retry a broken file only once it changes again
+                self.reload()
+        except (OSError, ValueError) as e:
+            logger.error("Tax rules reload failed, keeping version %s: %s", self._rules.version, e)
+
+
+registry = RuleRegistry()
+
+
+def get_year_rules(financial_year: Optional[str] = None, rules: Optional[RuleSet] = None) -> Mapping[str, RegimeRules]:
+    """
+    Look up the compiled rules of every regime in a financial year.
+
+    Args:
+        financial_year: Financial year such as '2024-25' (default year if omitted)
+        rules: RuleSet to read from (the active one if omitted)
+
+    Returns:
+        Mapping of regime name to compiled RegimeRules
+
+    Raises:
+        ValueError: If the financial year is unknown
+    """
+    rules = rules or registry.rules
+    year_rules = rules.years.get(financial_year or rules.default_year)
+    if year_rules is None:
+        raise ValueError(f"Unknown financial year: {financial_year}")
+    return year_rules
+
+
+def get_regime_rules(regime: str, financial_year: Optional[str] = None, rules: Optional[RuleSet] = None) -> RegimeRules:
+    """
+    Look up the compiled rules for a regime in a financial year.
+
+    Args:
+        regime: Tax regime ('old' or 'new')
+        financial_year: Financial year such as '2024-25' (default year if omitted)
+        rules: RuleSet to read from (the active one if omitted)
+
+    Returns:
+        Compiled RegimeRules
+
+    Raises:
+        ValueError: If the financial year or regime is unknown
+    """
+    year_rules = get_year_rules(financial_year, rules)
+    if regime not in year_rules:
+        raise ValueError("Invalid tax regime specified. Must be 'old' or 'new'.")
+    return year_rules[regime]
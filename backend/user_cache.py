@@ -0,0 +1,71 @@
+import logging
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from models import User
+from database import db
+from result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+user_cache = ResultCache(max_entries=10000, ttl=60)
+
+
+class CachedUser(NamedTuple):
+    """Read-only snapshot of a User row, safe to share between requests."""
+    id: int
+    username: str
+    created_at: datetime
+
+
+def _snapshot(user: Optional[User]) -> Optional[CachedUser]:
+    return CachedUser(user.id, user.username, user.created_at) if user else None
+
+
+def get_current_user() -> Optional[CachedUser]:
+    """
+    Resolve the user of the current JWT without a database query on cache hits.
+
+    Tokens carry the user id in their `uid` claim; tokens issued before that claim
+    existed fall back to a lookup by username. Rows are cached for USER_CACHE_TTL
+    seconds and invalidated when a transaction that updates or deletes the user
+    commits in this process; other workers pick the change up when their entry
+    expires.
+
+    Returns:
+        The current user, or None if the account no longer exists
+    """
+    identity = get_jwt_identity()
+    user_id = get_jwt().get("uid")
+    if user_id is None:
+        return _snapshot(User.query.filter_by(username=identity).first())
+
+    found, user = user_cache.get(user_id)
+    if not found:
+        user = _snapshot(db.session.get(User, user_id))
+        if user is not None:
+            user_cache.put(user_id, user)
+    # A token is only valid for the account it was issued to
+    if user is None or user.username != identity:
+        return None
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target: User) -> None:
+    # Flushed changes are not visible to other sessions until the commit, so
+    # only note the id here; invalidating now would let a concurrent read cache
+    # the old row again
+    object_session(target).info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_changed_users(session: Session) -> None:
+    # After a rollback the session itself may have cached its flushed, now discarded, changes
+    for user_id in session.info.pop("changed_user_ids", ()):
+        user_cache.invalidate(user_id)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+In-process benchmarks of the API endpoints.
+
+Requests go through the Flask test client to an app backed by a throwaway
+SQLite database, so no server or network is involved. The calculator result
+cache is disabled, so calculator endpoints do the full calculation, and the
+benchmark user's history is seeded so history endpoints read real pages.
+Reports the median time per request in microseconds.
+
+Usage: python benchmarks/endpoints.py [--requests N] [--repeat N]
+"""
+import argparse
+import itertools
+import logging
+import os
+import tempfile
+from typing import Callable, Dict
+
+from harness import BACKEND_DIR, sample_incomes, sample_deductions, time_per_call
+
+HISTORY_ROWS = 500
+
+
+def create_app(database_path: str):
+    """Import the backend app against a SQLite database; must run before anything imports config."""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "FLASK_ENV": "production",
+        "TAX_CACHE_MAX_ENTRIES": "0",
+        "HISTORY_WRITE_BEHIND": "false",
+        "DB_CREATE_ON_STARTUP": "true",
+    })
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        from app import app
+    finally:
+        os.chdir(cwd)
+    # Per-request info logs would dominate the timings
+    logging.disable(logging.INFO)
+    return app
+
+
+def benchmarks(client, headers: Dict[str, str]) -> Dict[str, Callable[[], object]]:
+    """Named callables that each send one request."""
+    incomes = itertools.cycle(sample_incomes(1000))
+    deductions = itertools.cycle(sample_deductions(1000))
+    batch = [{"income": income, "regime": "old", "deductions": deduction}
+             for income, deduction in zip(sample_incomes(100, seed=7), sample_deductions(100, seed=8))]
+    large_batch = [{"income": income, "regime": "old" if index % 2 else "new", "deductions": deduction,
+                    "rebates": {"80ccd": 15000.0, "87a": 10000.0} if index % 3 == 0 else {}}
+                   for index, (income, deduction)
+                   in enumerate(zip(sample_incomes(1000, seed=9), sample_deductions(1000, seed=10)))]
+
+    def send(method: str, url: str, **kwargs):
+        response = client.open(url, method=method, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.get_data(as_text=True)}")
+        return response
+
+    return {
+        "POST /calculate-tax": lambda: send(
+            "POST", "/calculate-tax", json={"income": next(incomes), "regime": "new"}),
+        "POST /calculate-tax/full": lambda: send(
+            "POST", "/calculate-tax/full", json={"income": next(incomes), "regime": "old", "deductions": next(deductions)}),
+        "GET /compare-regimes": lambda: send(
+            "GET", "/compare-regimes", query_string={"income": next(incomes), "deductions": next(deductions)}),
+        "GET /tax-slabs/new": lambda: send(
+            "GET", "/tax-slabs/new", query_string={"income": next(incomes)}),
+        "POST /calculate-tax/batch[100]": lambda: send(
+            "POST", "/calculate-tax/batch", json={"records": batch}),
+        "POST /calculate-tax/batch[1000, rebates]": lambda: send(
+            "POST", "/calculate-tax/batch", json={"records": large_batch}),
+        "GET /tax-history?page=1": lambda: send(
+            "GET", "/tax-history", query_string={"page": 1, "per_page": 20}),
+        "GET /tax-history?before=": lambda: send(
+            "GET", "/tax-history", query_string={"before": "", "per_page": 20}),
+        "GET /tax-history/summary": lambda: send("GET", "/tax-history/summary"),
+        "GET /user-info": lambda: send("GET", "/user-info"),
+    }
+
+
+def run(requests: int = 200, repeat: int = 5) -> Dict[str, float]:
+    """
+    Run every endpoint benchmark against a fresh SQLite database.
+
+    Returns:
+        Median microseconds per request, keyed 'api.<METHOD path>'
+    """
+    database_path = tempfile.mktemp(suffix=".db")
+    try:
+        app = create_app(database_path)
+        client = app.test_client()
+        client.post("/signup", json={"username": "bench", "password": "bench-password"})
+        token = client.post("/login", json={"username": "bench", "password": "bench-password"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for income in sample_incomes(HISTORY_ROWS, seed=11):
+            client.post("/calculate-tax", json={"income": income, "regime": "new"}, headers=headers)
+
+        results = {}
+        for name, func in benchmarks(client, headers).items():
+            func()  # warm up
+            results[f"api.{name}"] = time_per_call(func, number=requests, repeat=repeat)
+        return results
+    finally:
+        if os.path.exists(database_path):
+            os.remove(database_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per timing run (default: 200)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the median is reported (default: 5)")
+    args = parser.parse_args()
+
+    for name, us in run(args.requests, args.repeat).items():
+        print(f"{name:<48}{us:>12.2f} us")
+
+
+if __name__ == "__main__":
+    main()
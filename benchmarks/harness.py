@@ -0,0 +1,77 @@
+"""
+Shared helpers of the benchmark suite: timing, income samples and baselines.
+"""
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def sample_incomes(count: int, seed: int = 42) -> List[float]:
+    """
+    Annual incomes drawn from a log-normal distribution with a median of 8 lakh.
+
+    Most samples fall in the lower slabs, with a long tail reaching the
+    surcharge bands, like a real population of filers.
+    """
+    rng = np.random.default_rng(seed)
+    incomes = rng.lognormal(mean=np.log(800000), sigma=0.9, size=count)
+    return np.round(np.clip(incomes, 0, 60000000), 2).tolist()
+
+
+def sample_deductions(count: int, seed: int = 43) -> List[float]:
+    """Deductions between 0 and 2 lakh, a third of them zero."""
+    rng = np.random.default_rng(seed)
+    deductions = rng.uniform(0, 200000, size=count)
+    deductions[rng.random(count) < 1 / 3] = 0
+    return np.round(deductions, 2).tolist()
+
+
+def time_per_call(func: Callable[[], object], number: int, repeat: int, best: bool = False) -> float:
+    """
+    Time a callable.
+
+    Args:
+        func: Callable to time
+        number: Calls per timing run
+        repeat: Timing runs
+        best: Use the fastest run instead of the median; steadier for short,
+            CPU-bound code where slower runs are mostly scheduling noise
+
+    Returns:
+        Time per call in microseconds
+    """
+    runs = timeit.repeat(func, number=number, repeat=repeat)
+    return float(min(runs) if best else np.median(runs)) / number * 1e6
+
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results_us"]
+
+
+def save_baselines(results: Dict[str, float], path: str = BASELINES_PATH) -> None:
+    with open(path, "w") as f:
+        json.dump({"results_us": {name: round(us, 3) for name, us in sorted(results.items())}}, f, indent=2)
+        f.write("\n")
+
+
+def find_regressions(results: Dict[str, float], baselines: Dict[str, float],
+                     threshold: float) -> List[Tuple[str, float, float]]:
+    """Benchmarks more than `threshold` (a fraction) slower than their baseline, as (name, baseline, result)."""
+    return [
+        (name, baselines[name], us)
+        for name, us in results.items()
+        if name in baselines and us > baselines[name] * (1 + threshold)
+    ]
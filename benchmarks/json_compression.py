@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark JSON serialization and response compression on history-style payloads.
+
+Compares Flask's default JSON provider with the orjson-backed FastJSONProvider
+and reports the size of each payload raw, gzipped and brotli-compressed.
+
+Usage: python benchmarks/json_compression.py [--repeat N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from models import TaxCalculation
+from json_provider import FastJSONProvider, orjson
+from compression import compress_body, brotli
+from tax_calculator import calculate_tax_records
+
+
+def history_page(size: int) -> dict:
+    """A /tax-history response body with `size` calculations."""
+    start = datetime(2024, 4, 1)
+    calculations = []
+    for i in range(size):
+        income = random.randint(300000, 5000000)
+        regime = random.choice(["old", "new"])
+        calculations.append(TaxCalculation(
+            id=i + 1, user_id=1, gross_income=income, deductions=150000, taxable_income=income - 150000,
+            base_tax=income * 0.1, surcharge=0, health_education_cess=income * 0.004, total_tax=income * 0.104,
+            effective_tax_rate=10.4, regime=regime, take_home_annual=income * 0.896,
+            take_home_monthly=income * 0.896 / 12, created_at=start + timedelta(minutes=i)
+        ).to_dict())
+    return {"total": size, "pages": 1, "current_page": 1, "has_next": False, "calculations": calculations}
+
+
+def batch_results(size: int) -> dict:
+    """A /calculate-tax/batch response body with `size` results."""
+    records = [{"income": random.randint(0, 10000000), "regime": random.choice(["old", "new"])} for _ in range(size)]
+    return {"count": size, "results": calculate_tax_records(records)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="serializations timed per payload (default: 20)")
+    args = parser.parse_args()
+    random.seed(42)
+
+    app = Flask(__name__)
+    providers = {"stdlib": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = FastJSONProvider(app)
+    else:
+        print("orjson is not installed; only the stdlib provider is measured\n")
+
+    payloads = {
+        "history page (10)": history_page(10),
+        "history page (100)": history_page(100),
+        "history export (10000)": history_page(10000),
+        "batch results (20000)": batch_results(20000),
+    }
+
+    print(f"{'payload':<24}" + "".join(f"{name + ' ms':>12}" for name in providers) + f"{'speedup':>9}"
+          + f"{'raw KB':>10}{'gzip KB':>10}" + (f"{'br KB':>10}" if brotli else "") + f"{'saved':>8}")
+    with app.app_context():
+        for label, payload in payloads.items():
+            timings = {}
+            for name, provider in providers.items():
+                seconds = min(timeit.repeat(lambda: provider.response(payload), number=1, repeat=args.repeat))
+                timings[name] = seconds * 1000
+            body = providers["stdlib"].response(payload).get_data()
+            sizes = [len(body), len(compress_body(body, "gzip"))]
+            if brotli:
+                sizes.append(len(compress_body(body, "br")))
+            speedup = timings["stdlib"] / timings["orjson"] if "orjson" in timings else 1.0
+            print(f"{label:<24}" + "".join(f"{ms:>12.2f}" for ms in timings.values()) + f"{speedup:>8.1f}x"
+                  + "".join(f"{size / 1024:>10.1f}" for size in sizes) + f"{1 - min(sizes) / sizes[0]:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks of the tax calculator functions.
+
+Each benchmark runs a function over the same log-normal sample of incomes,
+with the result cache disabled so every call does the full calculation, and
+reports the fastest run's time per income in microseconds.
+
+Usage: python benchmarks/micro.py [--samples N] [--repeat N]
+"""
+import argparse
+from typing import Callable, Dict
+
+import numpy as np
+
+from harness import sample_incomes, sample_deductions, time_per_call
+from tax_calculator import (
+    result_cache, calculate_tax, compare_tax_regimes, calculate_tax_slabs_breakdown,
+    calculate_tax_full, calculate_tax_batch, calculate_tax_records, solve_regime_breakeven
+)
+
+
+def benchmarks(samples: int) -> Dict[str, Callable[[], object]]:
+    """Named callables that each process every sampled income once."""
+    incomes = sample_incomes(samples)
+    deductions = sample_deductions(samples)
+    pairs = list(zip(incomes, deductions))
+    income_array = np.array(incomes)
+    rebate_array = np.array([(15000.0, 10000.0) if index % 3 == 0 else (0.0, 0.0) for index in range(samples)])
+    # /calculate-tax/batch style records, every third one with rebates
+    records = [
+        {"income": income, "regime": "old" if index % 2 else "new", "deductions": deduction,
+         "rebates": {"80ccd": 15000.0, "87a": 10000.0} if index % 3 == 0 else {}}
+        for index, (income, deduction) in enumerate(pairs)
+    ]
+
+    return {
+        "calculate_tax[new]": lambda: [calculate_tax(income, "new") for income in incomes],
+        "calculate_tax[old]": lambda: [calculate_tax(income, "old", deduction) for income, deduction in pairs],
+        "compare_tax_regimes": lambda: [compare_tax_regimes(income, deduction) for income, deduction in pairs],
+        "calculate_tax_slabs_breakdown[new]": lambda: [calculate_tax_slabs_breakdown(income, "new") for income in incomes],
+        "calculate_tax_slabs_breakdown[old]": lambda: [calculate_tax_slabs_breakdown(income, "old") for income in incomes],
+        "calculate_tax_full": lambda: [calculate_tax_full(income, "old", deduction) for income, deduction in pairs],
+        "solve_regime_breakeven": lambda: [solve_regime_breakeven(income, deduction) for income, deduction in pairs],
+        "calculate_tax_batch[per record]": lambda: calculate_tax_batch(income_array, "old", deductions),
+        "calculate_tax_batch[rebates, per record]": lambda: calculate_tax_batch(income_array, "old", deductions, rebate_array),
+        # Records in, records out: the work /calculate-tax/batch does, against the scalar loop
+        "calculate_tax[records]": lambda: [
+            calculate_tax(record["income"], record["regime"], record["deductions"], record["rebates"])
+            for record in records
+        ],
+        "calculate_tax_records[per record]": lambda: calculate_tax_records(records),
+    }
+
+
+def run(samples: int = 1000, repeat: int = 5) -> Dict[str, float]:
+    """
+    Run every microbenchmark.
+
+    Returns:
+        Microseconds per income of the fastest run, keyed 'micro.<benchmark>'
+    """
+    max_entries, ttl = result_cache.max_entries, result_cache.ttl
+    result_cache.configure(0, ttl)
+    try:
+        return {
+            f"micro.{name}": time_per_call(func, number=1, repeat=repeat, best=True) / samples
+            for name, func in benchmarks(samples).items()
+        }
+    finally:
+        result_cache.configure(max_entries, ttl)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=1000, help="incomes per benchmark (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the fastest is reported (default: 5)")
+    args = parser.parse_args()
+
+    for name, us in run(args.samples, args.repeat).items():
+        print(f"{name:<48}{us:>12.2f} us")
+
+
+if __name__ == "__main__":
+    main()
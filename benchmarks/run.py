@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Run the benchmark suite and compare it with the stored baselines.
+
+Runs the calculator microbenchmarks (micro.py) and the in-process endpoint
+benchmarks (endpoints.py), prints each result next to its baseline from
+baselines.json, and exits with status 1 if any benchmark is slower than its
+baseline by more than the threshold, or has no baseline (unless --allow-new). Baselines are machine-specific: record
+them with --update-baselines on the machine that runs the comparison.
+
+Usage: python benchmarks/run.py [--quick] [--only micro|api] [--threshold FRACTION]
+                                [--update-baselines] [--allow-new] [--baselines FILE]
+"""
+import argparse
+import sys
+
+from harness import BASELINES_PATH, load_baselines, save_baselines, find_regressions
+import micro
+import endpoints
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer timing runs and requests, for a fast smoke check")
+    parser.add_argument("--only", choices=["micro", "api"], help="run only one level of the suite")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown against the baseline, as a fraction (default: 0.25)")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="baselines file (default: benchmarks/baselines.json)")
+    parser.add_argument("--update-baselines", action="store_true", help="store this run's results as the baselines")
+    parser.add_argument("--allow-new", action="store_true",
+                        help="only warn about benchmarks that have no baseline yet instead of failing")
+    args = parser.parse_args()
+
+    repeat = 3 if args.quick else 7
+    results = {}
+    if args.only in (None, "micro"):
+        # Same sample size either way: per-income times of the batch benchmark depend on it
+        results.update(micro.run(samples=1000, repeat=repeat))
+    if args.only in (None, "api"):
+        results.update(endpoints.run(requests=50 if args.quick else 200, repeat=repeat))
+
+    baselines = load_baselines(args.baselines)
+    print(f"{'benchmark':<48}{'baseline us':>14}{'result us':>14}{'change':>10}")
+    for name, us in results.items():
+        if name in baselines:
+            change = us / baselines[name] - 1
+            print(f"{name:<48}{baselines[name]:>14.2f}{us:>14.2f}{change:>+10.1%}")
+        else:
+            print(f"{name:<48}{'-':>14}{us:>14.2f}{'new':>10}")
+
+    if args.update_baselines:
+        save_baselines({**baselines, **results}, args.baselines)
+        print(f"\nBaselines written to {args.baselines}")
+        return
+
+    failed = False
+    missing = [name for name in results if name not in baselines]
+    if missing:
+        marker = "⚠️ " if args.allow_new else "❌"
+        print(f"\n{marker} {len(missing)} benchmark(s) without a baseline (record with --update-baselines):")
+        for name in missing:
+            print(f"   {name}")
+        failed = not args.allow_new
+
+    regressions = find_regressions(results, baselines, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than baseline:")
+        for name, baseline, us in regressions:
+            print(f"   {name}: {baseline:.2f} us -> {us:.2f} us")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\n✅ No benchmark more than {args.threshold:.0%} slower than baseline")
+
+
+if __name__ == "__main__":
+    main()
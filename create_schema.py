@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Create missing tables and indexes without touching existing data.
+
+Run once per deploy when the backend is started with DB_CREATE_ON_STARTUP=false.
+
+Usage: python create_schema.py
+"""
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(os.path.join(os.path.dirname(__file__), 'backend', '.env'))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask import Flask
+from sqlalchemy import inspect
+from config import Config
+from database import db, init_db, ensure_schema
+import models  # noqa: F401  (registers the tables on db.metadata)
+
+# Tables the backend needs; a deploy without any of these is not ready
+EXPECTED_TABLES = {'user', 'tax_calculation', 'tax_history_rollup', 'history_version', 'tax_job',
+                   'tax_job_result'}
+
+print("=" * 60)
+print("CREATE SCHEMA")
+print("=" * 60)
+
+app = Flask(__name__)
+app.config.from_object(Config)
+init_db(app, create_schema=False)
+
+print("\n1. Creating missing tables and indexes...")
+ensure_schema(app)
+
+with app.app_context():
+    print("\n2. Verifying tables...")
+    try:
+        expected = EXPECTED_TABLES | {table.name for table in db.metadata.sorted_tables}
+        if not db.metadata.sorted_tables:
+            print("   ❌ No tables registered on the metadata")
+            sys.exit(1)
+        existing = set(inspect(db.engine).get_table_names())
+        missing = sorted(expected - existing)
+        if missing:
+            print(f"   ❌ Missing tables: {', '.join(missing)}")
+            sys.exit(1)
+        print(f"   ✅ {len(expected)} tables present: {', '.join(sorted(expected))}")
+    except Exception as e:
+        print(f"   ❌ Error verifying tables: {e}")
+        sys.exit(1)
+
+print("\n" + "=" * 60)
+print("SCHEMA READY")
+print("=" * 60)
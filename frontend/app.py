@@ -1,11 +1,43 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
 import requests
 import os
+from urllib.parse import quote
+from backend_client import BackendClient, passthrough
+from profiling import init_profiling
 
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-very-secure-secret-key')
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://tax-backend:5000')
 
+# Pooled keep-alive client shared by every request to the backend
+backend = BackendClient(
+    BACKEND_URL,
+    pool_size=int(os.getenv('BACKEND_POOL_SIZE', '10')),
+    connect_timeout=float(os.getenv('BACKEND_CONNECT_TIMEOUT', '3.05')),
+    read_timeout=float(os.getenv('BACKEND_READ_TIMEOUT', '10')),
+    retries=int(os.getenv('BACKEND_RETRIES', '2'))
+)
+
+# Opt-in profiling of single requests (X-Profile header or PROFILE_EVERY_REQUEST)
+init_profiling(app, backend.session, backend.base_url)
+
+def backend_headers():
+    """Headers for proxying the current request: the session's token plus the client's body, encoding and validator headers."""
+    headers = {
+        "Authorization": f"Bearer {session['access_token']}",
+        # Responses are relayed undecoded, so only ask for encodings the client accepts
+        "Accept-Encoding": request.headers.get("Accept-Encoding", "identity")
+    }
+    if request.content_type:
+        headers["Content-Type"] = request.content_type
+    # Let the backend answer revalidations with 304 Not Modified
+    if request.headers.get("If-None-Match"):
+        headers["If-None-Match"] = request.headers["If-None-Match"]
+    # Profile the backend side of a profiled request too
+    if request.headers.get("X-Profile"):
+        headers["X-Profile"] = request.headers["X-Profile"]
+    return headers
+
 @app.route('/')
 def index():
     """Renders the homepage."""
@@ -23,10 +55,9 @@ def register():
             return render_template('register.html')
 
         try:
-            response = requests.post(
-                f"{BACKEND_URL}/signup",
-                json={"username": username, "password": password},
-                timeout=5
+            response = backend.post(
+                "/signup",
+                json={"username": username, "password": password}
             )
             
             # Check if response has content
@@ -66,10 +97,9 @@ def login():
             return render_template('login.html')
 
         try:
-            response = requests.post(
-                f"{BACKEND_URL}/login",
-                json={"username": username, "password": password},
-                timeout=5
+            response = backend.post(
+                "/login",
+                json={"username": username, "password": password}
             )
             
             # Check if response has content
@@ -121,38 +151,74 @@ def api_calculate_tax():
     if 'access_token' not in session:
         return jsonify({"message": "Unauthorized"}), 401
 
-    data = request.get_json()
-    headers = {"Authorization": f"Bearer {session['access_token']}"}
+    headers = backend_headers()
 
     try:
-        response = requests.post(
-            f"{BACKEND_URL}/calculate-tax",
-            json=data,
-            headers=headers
+        response = backend.post(
+            "/calculate-tax",
+            data=request.get_data(),
+            headers=headers,
+            stream=True
         )
-        return jsonify(response.json()), response.status_code
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"message": "Could not connect to backend"}), 503
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 
-@app.route('/api/compare-regimes', methods=['POST'])
-def api_compare_regimes():
-    """API endpoint for regime comparison."""
+@app.route('/api/calculate-tax/full', methods=['POST'])
+def api_calculate_tax_full():
+    """API endpoint for the calculation, slab breakdown and regime comparison in one call."""
     if 'access_token' not in session:
         return jsonify({"message": "Unauthorized"}), 401
 
-    data = request.get_json()
-    headers = {"Authorization": f"Bearer {session['access_token']}"}
+    headers = backend_headers()
 
     try:
-        response = requests.post(
-            f"{BACKEND_URL}/compare-regimes",
-            json=data,
-            headers=headers
+        response = backend.post(
+            "/calculate-tax/full",
+            data=request.get_data(),
+            headers=headers,
+            stream=True
         )
-        return jsonify(response.json()), response.status_code
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
+    except requests.exceptions.ConnectionError:
+        return jsonify({"message": "Could not connect to backend"}), 503
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@app.route('/api/compare-regimes', methods=['GET', 'POST'])
+def api_compare_regimes():
+    """API endpoint for regime comparison (GET responses are cacheable)."""
+    if 'access_token' not in session:
+        return jsonify({"message": "Unauthorized"}), 401
+
+    headers = backend_headers()
+
+    try:
+        if request.method == 'GET':
+            response = backend.get(
+                "/compare-regimes",
+                params=request.args,
+                headers=headers,
+                stream=True
+            )
+        else:
+            response = backend.post(
+                "/compare-regimes",
+                data=request.get_data(),
+                headers=headers,
+                stream=True
+            )
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"message": "Could not connect to backend"}), 503
     except Exception as e:
@@ -175,16 +241,24 @@ def api_tax_history():
     if 'access_token' not in session:
         return jsonify({"message": "Unauthorized"}), 401
 
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    headers = {"Authorization": f"Bearer {session['access_token']}"}
+    # Page number or before/after cursor, page size and whether to count the total
+    params = {
+        key: request.args[key]
+        for key in ('page', 'per_page', 'before', 'after', 'include_total')
+        if key in request.args
+    }
+    headers = backend_headers()
 
     try:
-        response = requests.get(
-            f"{BACKEND_URL}/tax-history?page={page}&per_page={per_page}",
-            headers=headers
+        response = backend.get(
+            "/tax-history",
+            params=params,
+            headers=headers,
+            stream=True
         )
-        return jsonify(response.json()), response.status_code
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"message": "Could not connect to backend"}), 503
     except Exception as e:
@@ -197,14 +271,17 @@ def api_delete_tax_calculation(calc_id):
     if 'access_token' not in session:
         return jsonify({"message": "Unauthorized"}), 401
 
-    headers = {"Authorization": f"Bearer {session['access_token']}"}
+    headers = backend_headers()
 
     try:
-        response = requests.delete(
-            f"{BACKEND_URL}/tax-history/{calc_id}",
-            headers=headers
+        response = backend.delete(
+            f"/tax-history/{calc_id}",
+            headers=headers,
+            stream=True
         )
-        return jsonify(response.json()), response.status_code
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"message": "Could not connect to backend"}), 503
     except Exception as e:
@@ -217,19 +294,57 @@ def api_tax_slabs(regime):
     if 'access_token' not in session:
         return jsonify({"message": "Unauthorized"}), 401
 
-    income = request.args.get('income', type=float)
-    headers = {"Authorization": f"Bearer {session['access_token']}"}
+    headers = backend_headers()
 
     try:
-        response = requests.get(
-            f"{BACKEND_URL}/tax-slabs/{regime}?income={income}",
-            headers=headers
+        # Forward every query parameter (income, financial_year) so the backend
+        # answers, and validates, the same resource the browser asked for
+        response = backend.get(
+            f"/tax-slabs/{quote(regime, safe='')}",
+            params=request.args,
+            headers=headers,
+            stream=True
         )
-        return jsonify(response.json()), response.status_code
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"message": "Could not connect to backend"}), 503
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
+
+@app.route('/api/tax-curve', methods=['GET'])
+def api_tax_curve():
+    """API endpoint for tax curves across an income range."""
+    if 'access_token' not in session:
+        return jsonify({"message": "Unauthorized"}), 401
+
+    headers = backend_headers()
+
+    try:
+        response = backend.get(
+            "/tax-curve",
+            params=request.args,
+            headers=headers,
+            stream=True
+        )
+        return passthrough(response)
+    except requests.exceptions.Timeout:
+        return jsonify({"message": "Backend timed out"}), 504
+    except requests.exceptions.ConnectionError:
+        return jsonify({"message": "Could not connect to backend"}), 503
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@app.route('/api/backend-stats', methods=['GET'])
+def api_backend_stats():
+    """Connection pool counters of the backend client, to confirm connections are reused."""
+    if 'access_token' not in session:
+        return jsonify({"message": "Unauthorized"}), 401
+
+    return jsonify(backend.stats()), 200
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8000) # Run on port 8000 for frontend
\ No newline at end of file
@@ -0,0 +1,118 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from flask import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds for backend paths that differ from the default
+ROUTE_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "/login": (3.05, 5),
+    "/signup": (3.05, 5),
+    "/tax-curve": (3.05, 30),
+}
+
+# Backend response headers relayed to the client by passthrough()
+PASSTHROUGH_HEADERS = (
+    "Content-Type", "Content-Encoding", "Content-Length", "ETag",
+    "Cache-Control", "Last-Modified", "Vary"
+)
+
+
+def passthrough(response: requests.Response, chunk_size: int = 64 * 1024) -> Response:
+    """
+    Relay a backend response to the client without decoding it.
+
+    The response must have been requested with stream=True. Its body is copied
+    chunk by chunk as received, still compressed if the backend compressed it,
+    and the connection goes back to the pool once the body has been sent.
+    """
+    def body():
+        try:
+            yield from response.raw.stream(chunk_size, decode_content=False)
+        finally:
+            response.close()
+
+    headers = {name: response.headers[name] for name in PASSTHROUGH_HEADERS if name in response.headers}
+    return Response(body(), status=response.status_code, headers=headers)
+
+
+class BackendClient:
+    """
+    Shared HTTP client for calls from the frontend to the backend API.
+
+    All requests go through one requests.Session, so connections to BACKEND_URL
+    are pooled and kept alive instead of being opened per call. Every request has
+    a connect and read timeout, and idempotent GETs are retried a bounded number
+    of times on connection errors and 502/503/504 responses.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 10, retries: int = 2):
+        self.base_url = base_url.rstrip("/")
+        self.default_timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self._requests = 0
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            status_forcelist=(502, 503, 504),
+            backoff_factor=0.1,
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def request(self, method: str, path: str, timeout: Optional[Tuple[float, float]] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a request to a backend path such as '/calculate-tax'.
+
+        Args:
+            method: HTTP method
+            path: Backend path, starting with '/'
+            timeout: (connect, read) timeout overriding the per-route default
+            **kwargs: Passed on to requests (json, params, headers, data, stream, ...)
+
+        Returns:
+            The backend response
+        """
+        route = "/" + path.lstrip("/").split("?", 1)[0]
+        timeout = timeout or ROUTE_TIMEOUTS.get(route, self.default_timeout)
+        with self._lock:
+            self._requests += 1
+        return self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def stats(self) -> Dict[str, float]:
+        """Connection reuse counters of the pool (connections opened vs requests sent over them)."""
+        connections = 0
+        pool_requests = 0
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+        return {
+            "requests": self._requests,
+            "connections_opened": connections,
+            "connections_reused": max(pool_requests - connections, 0),
+            "reuse_ratio": round(1 - connections / pool_requests, 4) if pool_requests else 0.0,
+            "pool_maxsize": self.pool_size
+        }
@@ -0,0 +1,156 @@
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+import requests
+from flask import Flask, Response, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+
+# Kept identical to StackSampler in backend/profiling.py: the backend and frontend are
+# separate Docker build contexts and images, so neither can import the other.
+class StackSampler:
+    """
+    Sampling profiler for one thread.
+
+    A background thread reads the target thread's current Python stack every
+    `interval` seconds and counts identical stacks. Functions are identified by
+    name, file and first line, so samples anywhere in a function add up.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class BackendCall(NamedTuple):
+    method: str
+    path: str
+    status: int
+    elapsed_ms: float
+    backend_profile_id: Optional[str]
+
+
+# Its id and sampler setup mirror RequestProfile in backend/profiling.py.
+class RequestProfile:
+    """Samples and backend calls captured for one profiled request."""
+
+    def __init__(self, interval: float):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.started = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.calls: List[BackendCall] = []
+        self.sampler.start()
+
+
+def write_profile(directory: str, profile: RequestProfile, stacks: Counter, summary: str) -> None:
+    """Write <id>.collapsed (flamegraph.pl / speedscope input) and <id>.calls.txt."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{profile.id}.collapsed"), "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    repeated: Dict[str, int] = Counter(f"{call.method} {call.path.split('?', 1)[0]}" for call in profile.calls)
+    with open(os.path.join(directory, f"{profile.id}.calls.txt"), "w") as f:
+        f.write(f"{summary}\n")
+        total_ms = sum(call.elapsed_ms for call in profile.calls)
+        f.write(f"{len(profile.calls)} backend calls, {total_ms:.2f} ms until response headers\n")
+        for route, count in repeated.items():
+            if count > 1:
+                f.write(f"Repeated: {route} ({count}x)\n")
+        f.write("\nIn order:\n")
+        for call in profile.calls:
+            backend_profile = f"  backend profile {call.backend_profile_id}" if call.backend_profile_id else ""
+            f.write(f"  {call.elapsed_ms:8.2f} ms  {call.status}  {call.method} {call.path}{backend_profile}\n")
+
+
+def init_profiling(app: Flask, session: requests.Session, base_url: str) -> None:
+    """
+    Profile individual proxied requests on demand.
+
+    A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>`, or every
+    request when PROFILE_EVERY_REQUEST is set. Its stack is sampled and every
+    call to the backend is recorded; the header is forwarded, so with the same
+    token the backend profiles its side too and the report links both. Results
+    go to PROFILE_DIR and the response carries the file prefix in
+    `X-Profile-Id`. With neither setting, no hooks are installed at all.
+    """
+    token = os.getenv("PROFILE_TOKEN", "")
+    every_request = os.getenv("PROFILE_EVERY_REQUEST", "false").lower() in ("1", "true", "yes")
+    if not token and not every_request:
+        return
+
+    directory = os.getenv("PROFILE_DIR", os.path.join(os.path.sep, "tmp", "tax-frontend-profiles"))
+    interval = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+
+    def record_backend_call(response: requests.Response, *args, **kwargs):
+        if has_request_context():
+            profile = g.get("profile")
+            if profile is not None:
+                profile.calls.append(BackendCall(
+                    response.request.method, response.url[len(base_url):], response.status_code,
+                    response.elapsed.total_seconds() * 1000, response.headers.get("X-Profile-Id")
+                ))
+
+    session.hooks["response"].append(record_backend_call)
+
+    @app.before_request
+    def start_profile():
+        header = request.headers.get("X-Profile")
+        if every_request or (header and token and hmac.compare_digest(header.encode(), token.encode())):
+            g.profile = RequestProfile(interval)
+
+    @app.after_request
+    def finish_profile(response: Response) -> Response:
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        stacks = profile.sampler.stop()
+        elapsed_ms = (time.perf_counter() - profile.started) * 1000
+        summary = (f"{request.method} {request.full_path.rstrip('?')} -> {response.status_code} "
+                   f"({request.endpoint}) in {elapsed_ms:.2f} ms")
+        try:
+            write_profile(directory, profile, stacks, summary)
+        except OSError as e:
+            logger.error("Could not write profile %s: %s", profile.id, e)
+            return response
+        response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    @app.teardown_request
+    def discard_profile(error=None):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.sampler.stop()
+
+    logger.warning("Request profiling enabled (%s), writing to %s",
+                   "every request" if every_request else "X-Profile header", directory)
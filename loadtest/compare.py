@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+"""
+Compare load-test reports saved with run.py --output.
+
+Prints throughput, error rate and p50/p95/p99 latency per endpoint for every
+run in the given files side by side, e.g. to compare worker types or counts
+measured on different days.
+
+Usage: python loadtest/compare.py REPORT.json [REPORT.json ...]
+"""
+import argparse
+import json
+
+from stats import format_comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("reports", nargs="+", help="JSON files written by run.py --output")
+    args = parser.parse_args()
+
+    reports = []
+    for path in args.reports:
+        with open(path) as f:
+            reports.extend(json.load(f))
+    print(format_comparison(reports))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""
+Load-test the backend (and optionally the frontend) on this machine.
+
+Boots the backend under gunicorn against a throwaway SQLite database, checks
+that payroll CSV imports work as raw bodies and uploads, signs up and logs in
+a set of virtual users, and has them replay a weighted mix of
+requests at a combined target rate. Reports throughput, error rate and
+p50/p95/p99 latency per endpoint, measured from each request's scheduled send
+time, plus the median and p99 service time. Several gunicorn configurations can be run
+back to back and compared; reports can be saved and compared later with
+compare.py.
+
+Usage: python loadtest/run.py [--configs sync:2,gthread:2:4] [--rps N] [--duration S]
+                              [--users N] [--mix calculate=40,compare=20,...]
+                              [--frontend] [--output FILE]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import requests
+
+import servers
+from stats import Recorder, build_report, format_report, format_comparison
+
+DEFAULT_MIX = "calculate=40,compare=20,slabs=20,history=15,delete=5"
+
+
+class VirtualUser:
+    """One logged-in user replaying requests, directly against the backend or through the frontend."""
+
+    def __init__(self, index: int, base_url: str, via_frontend: bool, seed: int):
+        self.username = f"loaduser{index}"
+        self.base_url = base_url
+        self.via_frontend = via_frontend
+        self.rng = random.Random(seed + index)
+        self.session = requests.Session()
+        self.calculation_ids: List[int] = []
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{'/api' if self.via_frontend else ''}{path}"
+
+    def login(self) -> None:
+        credentials = {"username": self.username, "password": "load-test-password"}
+        if self.via_frontend:
+            self.session.post(f"{self.base_url}/register", data=credentials, allow_redirects=False)
+            response = self.session.post(f"{self.base_url}/login", data=credentials, allow_redirects=False)
+            if "session" not in self.session.cookies:
+                raise RuntimeError(f"Login of {self.username} through the frontend failed ({response.status_code})")
+        else:
+            self.session.post(f"{self.base_url}/signup", json=credentials)
+            response = self.session.post(f"{self.base_url}/login", json=credentials)
+            response.raise_for_status()
+            self.session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    def income(self) -> float:
+        return round(self.rng.lognormvariate(13.59, 0.9), 2)  # median about 8 lakh
+
+    def calculate(self) -> Tuple[str, requests.Response]:
+        regime = self.rng.choice(["old", "new"])
+        return "calculate", self.session.post(self.url("/calculate-tax"), json={"income": self.income(), "regime": regime})
+
+    def compare(self) -> Tuple[str, requests.Response]:
+        params = {"income": self.income(), "deductions": self.rng.choice([0, 50000, 150000])}
+        return "compare", self.session.get(self.url("/compare-regimes"), params=params)
+
+    def slabs(self) -> Tuple[str, requests.Response]:
+        regime = self.rng.choice(["old", "new"])
+        return "slabs", self.session.get(self.url(f"/tax-slabs/{regime}"), params={"income": self.income()})
+
+    def history(self) -> Tuple[str, requests.Response]:
+        response = self.session.get(self.url("/tax-history"), params={"page": 1, "per_page": 20})
+        if response.status_code == 200:
+            self.calculation_ids = [calculation["id"] for calculation in response.json()["calculations"]]
+        return "history", response
+
+    def delete(self) -> Tuple[str, requests.Response]:
+        if not self.calculation_ids:
+            return self.history()  # nothing known to delete yet
+        calc_id = self.calculation_ids.pop()
+        return "delete", self.session.delete(self.url(f"/tax-history/{calc_id}"))
+
+    def run(self, mix: Dict[str, int], interval: float, offset: float, start: float, warmup_end: float,
+            end: float, recorder: Recorder) -> None:
+        """
+        Send one request every `interval` seconds from `start + offset` until `end`.
+
+        Latency is measured from when a request was scheduled, not when it was
+        sent, so a slow response also counts against the requests it held up
+        (no coordinated omission); the time the server actually took is
+        recorded separately as service time.
+        """
+        operations = [getattr(self, name) for name in mix]
+        weights = list(mix.values())
+        scheduled = start + offset
+        while scheduled < end:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            operation = self.rng.choices(operations, weights)[0]
+            sent = time.perf_counter()
+            try:
+                endpoint, response = operation()
+                ok = response.status_code < 400
+            except requests.exceptions.RequestException:
+                endpoint, ok = operation.__name__, False
+            completed = time.perf_counter()
+            if scheduled >= warmup_end:
+                recorder.record(endpoint, (completed - scheduled) * 1000, (completed - sent) * 1000, ok)
+            scheduled += interval
+
+
+def check_csv_upload(backend_url: str, rows: int = 200) -> None:
+    """
+    Import a payroll CSV both as a raw text/csv body and as a multipart upload.
+
+    The raw body is read from gunicorn's own request stream, which the Flask test
+    client used by the benchmarks does not exercise; raise if either path fails.
+    """
+    session = requests.Session()
+    credentials = {"username": "loadcheck", "password": "load-test-password"}
+    session.post(f"{backend_url}/signup", json=credentials)
+    response = session.post(f"{backend_url}/login", json=credentials)
+    response.raise_for_status()
+    session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    body = "income,regime,deductions\n" + "".join(
+        f"{500000 + row * 1000},{'old' if row % 2 else 'new'},{row % 3 * 50000}\n" for row in range(rows))
+    uploads = {
+        "raw body": {"data": body.encode(), "headers": {"Content-Type": "text/csv"}},
+        "multipart": {"files": {"file": ("payroll.csv", body.encode(), "text/csv")}},
+    }
+    for name, kwargs in uploads.items():
+        response = session.post(f"{backend_url}/calculate-tax/csv", params={"format": "ndjson"}, **kwargs)
+        results = [json.loads(line) for line in response.text.splitlines()]
+        if response.status_code != 200 or len(results) != rows or any("error" in result for result in results):
+            raise RuntimeError(f"CSV import ({name}) failed: {response.status_code} {response.text[:200]}")
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("calculate", "compare", "slabs", "history", "delete"):
+            raise argparse.ArgumentTypeError(f"Unknown operation in mix: {name!r}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def parse_configs(text: str) -> List[Tuple[str, int, int]]:
+    """'sync:2,gthread:2:4' -> [(worker class, workers, threads), ...]"""
+    configs = []
+    for part in text.split(","):
+        fields = part.strip().split(":")
+        worker_class, workers = fields[0], int(fields[1]) if len(fields) > 1 else 1
+        threads = int(fields[2]) if len(fields) > 2 else 1
+        configs.append((worker_class, workers, threads))
+    return configs
+
+
+def run_config(args, worker_class: str, workers: int, threads: int) -> Dict:
+    label = f"{worker_class}:{workers}" + (f":{threads}" if threads > 1 else "") + (" +frontend" if args.frontend else "")
+    database_path = tempfile.mktemp(suffix=".db")
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    processes = []
+    try:
+        backend, base_url = servers.start_backend(database_path, workers, worker_class, threads, extra_env,
+                                                  log_path=os.path.join(tempfile.gettempdir(), "loadtest-backend.log"))
+        processes.append(backend)
+        check_csv_upload(base_url)
+        if args.frontend:
+            frontend, base_url = servers.start_frontend(base_url, args.frontend_workers, "gthread", 4,
+                                                        log_path=os.path.join(tempfile.gettempdir(), "loadtest-frontend.log"))
+            processes.append(frontend)
+
+        users = [VirtualUser(i, base_url, args.frontend, args.seed) for i in range(args.users)]
+        for user in users:
+            user.login()
+
+        recorder = Recorder()
+        interval = args.users / args.rps
+        start = time.perf_counter() + 0.5
+        warmup_end = start + args.warmup
+        end = warmup_end + args.duration
+        user_threads = [
+            threading.Thread(target=user.run, daemon=True,
+                             args=(args.mix, interval, interval * i / args.users, start, warmup_end, end, recorder))
+            for i, user in enumerate(users)
+        ]
+        for thread in user_threads:
+            thread.start()
+        for thread in user_threads:
+            thread.join()
+    finally:
+        for proc in reversed(processes):
+            servers.stop(proc)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database_path + suffix):
+                os.remove(database_path + suffix)
+
+    config = {"label": label, "worker_class": worker_class, "workers": workers, "threads": threads,
+              "frontend": args.frontend, "rps": args.rps, "users": args.users, "mix": args.mix}
+    return build_report(recorder, args.duration, config)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--configs", type=parse_configs, default=parse_configs("sync:2"),
+                        help="gunicorn configurations to run, as class:workers[:threads], comma-separated (default: sync:2)")
+    parser.add_argument("--rps", type=float, default=50, help="combined target requests per second (default: 50)")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds per configuration (default: 30)")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of load before measuring (default: 3)")
+    parser.add_argument("--users", type=int, default=10, help="virtual users (default: 10)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--frontend", action="store_true", help="send requests through the frontend proxy")
+    parser.add_argument("--frontend-workers", type=int, default=2, help="frontend gunicorn workers (default: 2)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra backend environment variable, e.g. HISTORY_WRITE_BEHIND=true (repeatable)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed of the request mix (default: 42)")
+    parser.add_argument("--output", help="write the reports to this JSON file")
+    args = parser.parse_args()
+
+    reports = []
+    for worker_class, workers, threads in args.configs:
+        report = run_config(args, worker_class, workers, threads)
+        reports.append(report)
+        print(format_report(report) + "\n")
+
+    if len(reports) > 1:
+        print(format_comparison(reports))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nReports written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
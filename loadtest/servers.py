@@ -0,0 +1,104 @@
+"""
+Start and stop local backend and frontend servers for a load test.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+import requests
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+FRONTEND_DIR = os.path.join(ROOT_DIR, 'frontend')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(url: str, proc: subprocess.Popen, timeout: float = 60) -> None:
+    """Poll a URL until it answers, failing early if the server process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode} before {url} answered")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not answer within {timeout:.0f}s")
+
+
+def _gunicorn(cwd: str, port: int, workers: int, worker_class: str, threads: int,
+              env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "gunicorn", "app:app",
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers),
+        "--worker-class", worker_class,
+        "--threads", str(threads),
+    ]
+    log = open(log_path, "w")
+    return subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def start_backend(database_path: str, workers: int, worker_class: str, threads: int,
+                  extra_env: Optional[Dict[str, str]] = None, log_path: str = os.devnull):
+    """
+    Boot the backend under gunicorn against a SQLite database.
+
+    The database is switched to WAL mode so readers in one worker are not
+    blocked by a writer in another, which SQLite's default journal would do.
+
+    Returns:
+        (process, base URL)
+    """
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "FLASK_ENV": "production",
+        # Logins only set up the virtual users; keep them cheap so setup is quick
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    })
+    env.update(extra_env or {})
+    proc = _gunicorn(BACKEND_DIR, port, workers, worker_class, threads, env, log_path)
+    url = f"http://127.0.0.1:{port}"
+    wait_until_healthy(f"{url}/health", proc)
+
+    import sqlite3
+    with sqlite3.connect(database_path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+    return proc, url
+
+
+def start_frontend(backend_url: str, workers: int, worker_class: str, threads: int,
+                   log_path: str = os.devnull):
+    """
+    Boot the frontend under gunicorn, proxying to a running backend.
+
+    Returns:
+        (process, base URL)
+    """
+    port = free_port()
+    env = dict(os.environ, BACKEND_URL=backend_url)
+    proc = _gunicorn(FRONTEND_DIR, port, workers, worker_class, threads, env, log_path)
+    url = f"http://127.0.0.1:{port}"
+    wait_until_healthy(f"{url}/", proc)
+    return proc, url
+
+
+def stop(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
@@ -0,0 +1,100 @@
+"""
+Latency statistics and report tables for load tests.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+class Recorder:
+    """
+    Collects (latency, service time, success) samples per endpoint; appends are thread-safe under the GIL.
+
+    Latency runs from when a request was scheduled to when its response
+    arrived; service time from when it was actually sent.
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.service: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency_ms: float, service_ms: float, ok: bool) -> None:
+        self.samples[endpoint].append(latency_ms)
+        self.service[endpoint].append(service_ms)
+        if not ok:
+            self.errors[endpoint] += 1
+
+
+def summarize(latencies: Sequence[float], service: Sequence[float], errors: int, duration: float) -> Dict[str, float]:
+    """Latency and service time percentiles in milliseconds, throughput in requests per second and the error rate."""
+    count = len(latencies)
+    if not count:
+        return {"requests": 0, "rps": 0.0, "error_rate": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0,
+                "service_p50": 0.0, "service_p99": 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    service_p50, service_p99 = np.percentile(service, [50, 99])
+    return {
+        "requests": count,
+        "rps": round(count / duration, 2),
+        "error_rate": round(errors / count, 4),
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(max(latencies)), 2),
+        "service_p50": round(float(service_p50), 2),
+        "service_p99": round(float(service_p99), 2),
+    }
+
+
+def build_report(recorder: Recorder, duration: float, config: Dict[str, Any]) -> Dict[str, Any]:
+    endpoints = {
+        endpoint: summarize(latencies, recorder.service[endpoint], recorder.errors[endpoint], duration)
+        for endpoint, latencies in sorted(recorder.samples.items())
+    }
+    all_latencies = [latency for latencies in recorder.samples.values() for latency in latencies]
+    all_service = [service for times in recorder.service.values() for service in times]
+    return {
+        "label": config["label"],
+        "config": config,
+        "duration": round(duration, 2),
+        "endpoints": endpoints,
+        "overall": summarize(all_latencies, all_service, sum(recorder.errors.values()), duration),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['label']}: {report['duration']:.0f}s at a target of {report['config']['rps']} rps",
+        f"{'endpoint':<22}{'requests':>10}{'rps':>9}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        f"{'svc p50':>10}{'svc p99':>10}",
+    ]
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for endpoint, stats in rows:
+        lines.append(
+            f"{endpoint:<22}{stats['requests']:>10}{stats['rps']:>9.1f}{stats['error_rate']:>9.1%}"
+            f"{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}{stats['max']:>10.1f}"
+            f"{stats['service_p50']:>10.1f}{stats['service_p99']:>10.1f}"
+        )
+    lines.append("Latency is measured from each request's scheduled send time; svc is measured from when it was actually sent.")
+    return "\n".join(lines)
+
+
+def format_comparison(reports: Sequence[Dict[str, Any]]) -> str:
+    """Side-by-side throughput, error rate, p50/p95/p99 latency and p99 service time of several runs, per endpoint."""
+    endpoints = sorted({endpoint for report in reports for endpoint in report["endpoints"]}) + ["overall"]
+    width = max(24, max(len(report["label"]) for report in reports) + 2)
+    lines = []
+    for metric, fmt in (("rps", "{:.1f}"), ("error_rate", "{:.1%}"), ("p50", "{:.1f}"), ("p95", "{:.1f}"), ("p99", "{:.1f}"),
+                        ("service_p99", "{:.1f}")):
+        unit = " ms" if metric.startswith(("p", "service")) else ""
+        lines.append(f"\n{metric + unit:<22}" + "".join(f"{report['label']:>{width}}" for report in reports))
+        for endpoint in endpoints:
+            cells = []
+            for report in reports:
+                stats = report["overall"] if endpoint == "overall" else report["endpoints"].get(endpoint)
+                # Reports saved before service time was recorded lack it
+                cells.append(fmt.format(stats[metric]) if stats and metric in stats else "-")
+            lines.append(f"{endpoint:<22}" + "".join(f"{cell:>{width}}" for cell in cells))
+    return "\n".join(lines).lstrip("\n")
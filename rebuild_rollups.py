@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Rebuild the tax history rollups used by /tax-history/summary from scratch.
+
+Usage: python rebuild_rollups.py [--user-id ID] [--batch-size N]
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(os.path.join(os.path.dirname(__file__), 'backend', '.env'))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask import Flask
+from config import Config
+from database import db, init_db
+from models import TaxHistoryRollup
+from history_rollup import rebuild_rollups
+
+parser = argparse.ArgumentParser(description="Rebuild tax history rollups from the TaxCalculation table.")
+parser.add_argument("--user-id", type=int, help="only rebuild this user's rollups")
+parser.add_argument("--batch-size", type=int, default=10000, help="history rows read per batch (default: 10000)")
+args = parser.parse_args()
+
+print("=" * 60)
+print("REBUILD TAX HISTORY ROLLUPS")
+print("=" * 60)
+
+app = Flask(__name__)
+app.config.from_object(Config)
+init_db(app)
+
+with app.app_context():
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"\n1. Rolling up history for {scope} in batches of {args.batch_size}...")
+    print("   ⚠️  Pause history writes while this runs, or some calculations may be counted twice or missed")
+    try:
+        processed = rebuild_rollups(args.user_id, args.batch_size)
+        print(f"   ✅ {processed} history rows rolled up")
+    except Exception as e:
+        db.session.rollback()
+        print(f"   ❌ Error rebuilding rollups: {e}")
+        sys.exit(1)
+
+    print("\n2. Verifying rollups...")
+    try:
+        rollup_count = TaxHistoryRollup.query.count()
+        print(f"   ✅ TaxHistoryRollup table: {rollup_count} records")
+    except Exception as e:
+        print(f"   ❌ Error verifying rollups: {e}")
+        sys.exit(1)
+
+print("\n" + "=" * 60)
+print("REBUILD COMPLETE")
+print("=" * 60)
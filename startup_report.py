@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Measure backend startup time, phase by phase.
+
+Each run imports the backend app in a fresh interpreter and collects the
+phase timings it records (imports, app setup, database, services, warm-up,
+handlers), plus the wall time of the whole process. The median of the runs is
+reported. Save a report with --output and compare later runs against it with
+--baseline to catch startup regressions.
+
+Usage: python startup_report.py [--runs N] [--sqlite] [--no-schema]
+                                [--output FILE] [--baseline FILE] [--threshold FRACTION]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+CHILD_CODE = (
+    "import json, sys\n"
+    "from app import startup_timer\n"
+    "sys.stdout.write('STARTUP ' + json.dumps(startup_timer.report()) + '\\n')\n"
+)
+
+parser = argparse.ArgumentParser(description="Report backend startup time per phase.")
+parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start (default: 5)")
+parser.add_argument("--sqlite", action="store_true", help="use a throwaway SQLite database instead of DATABASE_URL")
+parser.add_argument("--no-schema", action="store_true", help="start with DB_CREATE_ON_STARTUP=false")
+parser.add_argument("--output", help="write the report to this JSON file")
+parser.add_argument("--baseline", help="compare against a report saved with --output")
+parser.add_argument("--threshold", type=float, default=0.25,
+                    help="allowed slowdown of the total against the baseline, as a fraction (default: 0.25)")
+args = parser.parse_args()
+
+
+def run_once(env):
+    """Start one interpreter; returns its phase timings plus the process wall time in ms."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", CHILD_CODE], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            timings = json.loads(line[len("STARTUP "):])
+            timings["process"] = round(wall, 2)
+            return timings
+    sys.stderr.write(proc.stderr)
+    raise SystemExit(f"Backend failed to start (exit code {proc.returncode})")
+
+
+env = dict(os.environ, FLASK_ENV=os.environ.get("FLASK_ENV", "production"))
+if args.no_schema:
+    env["DB_CREATE_ON_STARTUP"] = "false"
+sqlite_path = None
+if args.sqlite:
+    sqlite_path = tempfile.mktemp(suffix=".db")
+    env["DATABASE_URL"] = f"sqlite:///{sqlite_path}"
+
+try:
+    runs = [run_once(env) for _ in range(args.runs)]
+finally:
+    if sqlite_path and os.path.exists(sqlite_path):
+        os.remove(sqlite_path)
+
+report = {
+    "runs": args.runs,
+    "schema_check": not args.no_schema,
+    "median_ms": {phase: round(statistics.median(run[phase] for run in runs), 2) for phase in runs[0]}
+}
+
+print("=" * 60)
+print("BACKEND STARTUP TIME")
+print("=" * 60)
+print(f"{args.runs} runs, schema check {'on' if report['schema_check'] else 'off'}, median ms\n")
+for phase, ms in report["median_ms"].items():
+    print(f"   {phase:<12} {ms:>10.1f}")
+
+if args.output:
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["median_ms"]
+    print(f"\nCompared with {args.baseline}:")
+    for phase, ms in report["median_ms"].items():
+        if phase in baseline:
+            print(f"   {phase:<12} {baseline[phase]:>10.1f} -> {ms:>10.1f}")
+    limit = baseline["total"] * (1 + args.threshold)
+    if report["median_ms"]["total"] > limit:
+        print(f"\n❌ Startup regressed: total {report['median_ms']['total']:.1f} ms > {limit:.1f} ms allowed")
+        sys.exit(1)
+    print("\n✅ Startup time within threshold")